@@ -1,39 +1,143 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import random
+import functools
 import json
-from datetime import datetime, timedelta
+import os
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 # Assurez-vous d'avoir installé : pip install supabase gotrue
-from supabase import create_client, Client
-from gotrue.errors import AuthApiError
+# (supabase, pandas et matplotlib sont importés à la demande : voir startup.py)
+from startup import IMPORT_TIMES, lazy_import
+from progression import CONFIG_PATH, load_progression
+from log_store import LogStore
+import engine
+from engine import PlayerState
+from export import EXPORT_FORMATS, export_bytes
+from importer import format_from_name, read_import, replay_import
+from citations import CitationCache
+from bootstrap import Bootstrap
+from charts import ChartCache, build_chart_frame, chart_fingerprint, render_chart_png
+from storage import (DeltaSaver, LocalAuthClient, LocalAuthError, SpillStore, SqliteBackend, SupabaseBackend,
+                     WriteBehindQueue)
+from memory import SessionMemory
+from profiling import Profiler, ProfiledBackend, profiled, profiling_enabled
 
 # --- CONFIGURATION SUPABASE ---
 try:
     SUPABASE_URL = st.secrets["SUPABASE_URL"]
     SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    TABLE_NAME = st.secrets.get("SUPABASE_TABLE", "user_data")
     DB_CONNECTED = True
 except Exception as e:
     DB_CONNECTED = False
-    st.warning("Base de données non connectée. Vérifiez le fichier .streamlit/secrets.toml")
+    st.warning("Supabase non configuré (.streamlit/secrets.toml) : comptes et données sont enregistrés localement (SQLite).")
+
+# Base locale utilisée sans Supabase (hors ligne, développement) ; ":memory:" pour une base jetable
+CITATIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "citations.json")
+LOCAL_DB_PATH = os.environ.get("LEVEL_CRUSH_DB", "level_crush.db")
+if LOCAL_DB_PATH != ":memory:" and not os.path.isabs(LOCAL_DB_PATH):
+    LOCAL_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), LOCAL_DB_PATH)
+
+# Mémoire des sessions (memory.py) : historique ancien des sessions inactives déchargé
+# dans un fichier SQLite propre au processus ; budget optionnel par worker
+IDLE_SECONDS = float(os.environ.get("LEVEL_CRUSH_IDLE_SECONDS", 900))
+MEMORY_BUDGET_MB = os.environ.get("LEVEL_CRUSH_MEMORY_BUDGET_MB")
+SPILL_PATH = os.environ.get("LEVEL_CRUSH_SPILL") or os.path.join(
+    tempfile.gettempdir(), f"level_crush_spill_{os.getpid()}.db"
+)
+
+@st.cache_resource
+def get_http_pool():
+    """Pool de connexions HTTP partagé par le processus : (client httpx, métriques)"""
+    return lazy_import("storage.supabase_client").make_http_client()
+
+@st.cache_resource
+def get_supabase_client():
+    """Client Supabase des données, créé une fois par processus (jamais authentifié)"""
+    http_client, _ = get_http_pool()
+    return lazy_import("storage.supabase_client").create_supabase_client(SUPABASE_URL, SUPABASE_KEY, http_client)
+
+@st.cache_resource
+def get_profiler():
+    """Instrumentation des reruns, opt-in (voir profiling.py) ; agrégats partagés par le processus"""
+    try:
+        secret = bool(st.secrets.get("PROFILE", False))
+    except Exception:
+        secret = False
+    return Profiler(profiling_enabled() or secret)
+
+@st.cache_resource
+def get_local_backend():
+    """Base SQLite locale : données et comptes quand Supabase n'est pas configuré ;
+    citations reprises de citations.json pour les types encore absents de la base"""
+    backend = SqliteBackend(LOCAL_DB_PATH)
+    with open(CITATIONS_PATH, encoding="utf-8") as f:
+        backend.seed_citations(json.load(f))
+    return backend
+
+@st.cache_resource
+def get_backend():
+    """Table Supabase si configurée, sinon base SQLite locale (même interface)"""
+    if DB_CONNECTED:
+        backend = SupabaseBackend(get_supabase_client(), TABLE_NAME)
+    else:
+        backend = get_local_backend()
+    if get_profiler().enabled:
+        return ProfiledBackend(backend, get_profiler())
+    return backend
+
+@st.cache_resource
+def get_session_memory():
+    """Comptabilité mémoire de toutes les sessions du processus"""
+    budget = float(MEMORY_BUDGET_MB) * 1024 * 1024 if MEMORY_BUDGET_MB else None
+    return SessionMemory(SpillStore(SPILL_PATH), idle_seconds=IDLE_SECONDS, budget_bytes=budget)
+
+@st.cache_resource
+def get_bootstrap_pool():
+    """Threads des lectures de démarrage de session (bootstrap.py), partagés par le processus"""
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="bootstrap")
+
+def get_auth_client():
+    """Client propre à la session pour l'authentification : la session utilisateur
+    ne doit pas se retrouver dans le client partagé (seul le transport HTTP l'est).
+    Sans Supabase : comptes locaux de la base SQLite (storage/local_auth.py)"""
+    if 'auth_client' not in st.session_state and not DB_CONNECTED:
+        st.session_state.auth_client = LocalAuthClient(get_local_backend())
+    if 'auth_client' not in st.session_state:
+        http_client, _ = get_http_pool()
+        st.session_state.auth_client = lazy_import("storage.supabase_client").create_supabase_client(
+            SUPABASE_URL, SUPABASE_KEY, http_client
+        )
+    return st.session_state.auth_client
 
 APP_VERSION = "v1.0.1-beta"
 
 # --- CONFIGURATION DE LA PAGE ---
 st.set_page_config(page_title="Task RPG", page_icon="⚔️")
 
-# --- DATA: TITRES & RANGS ---
-TITLES = [
-    (1, "Starter", "#DCDDDF"), (3, "Néophyte", "#3498DB"), (6, "Aspirant", "#2ECC71"), 
-    (10, "Soldat de Plomb", "#E67E22"), (14, "Gardien de Fer", "#95A5A6"), 
-    (19, "Traqueur Silencieux", "#9B59B6"), (24, "Vanguard", "#2980B9"), 
-    (30, "Chevalier d'Acier", "#BDC3C7"), (36, "Briseur de Chaînes", "#F39C12"), 
-    (43, "Architecte du Destin", "#34495E"), (50, "Légat du Système", "#16A085"), 
-    (58, "Commandeur", "#27AE60"), (66, "Seigneur de Guerre", "#C0392B"), 
-    (75, "Entité Transcendante", "#F1C40F"), (84, "Demi-Dieu", "#E74C3C"), 
-    (93, "Souverain", "#8E44AD"), (100, "LEVEL CRUSHER", "#000000")
-]
+# --- PROFILAGE (opt-in : LEVEL_CRUSH_PROFILE=1 ou secret PROFILE) ---
+PROFILER = get_profiler()
+if PROFILER.enabled:
+    if 'profile_trace' in st.session_state:
+        # Rerun précédent coupé par st.stop() / st.rerun() : clôturé maintenant
+        st.session_state.profile_trace.finish("interrupted")
+    if 'profile_session' not in st.session_state:
+        st.session_state.profile_session = uuid.uuid4().hex[:8]
+    st.session_state.profile_trace = PROFILER.start_rerun(st.session_state.profile_session)
+    st.session_state.profile_full_run = True
+
+# --- DATA: PROGRESSION (config.json) ---
+@st.cache_resource(max_entries=1)
+def _load_progression(config_mtime):
+    """Compile config.json une fois, partagé entre toutes les sessions"""
+    return load_progression(CONFIG_PATH)
+
+def get_progression():
+    # La clé mtime invalide le cache uniquement quand le fichier change
+    return _load_progression(os.path.getmtime(CONFIG_PATH))
+
+PROG = get_progression()
 
 # --- STYLE CSS (POLICE MANUSCRITE & DESIGN PAPIER REALISTE) ---
 st.markdown("""
@@ -131,31 +235,49 @@ st.markdown("""
 if 'user' not in st.session_state:
     st.session_state.user = None
 
+def auth_errors():
+    """Erreurs d'identifiants du client d'authentification (Supabase ou local)"""
+    if not DB_CONNECTED:
+        return LocalAuthError
+    from gotrue.errors import AuthApiError
+    return AuthApiError
+
+@profiled("auth")
 def handle_login(email, password):
     try:
-        response = supabase.auth.sign_in_with_password({"email": email, "password": password})
+        response = get_auth_client().auth.sign_in_with_password({"email": email, "password": password})
         st.session_state.user = response.user
         st.rerun()
-    except AuthApiError as e:
+    except auth_errors() as e:
         st.error(f"Erreur de connexion : {e}")
     except Exception as e:
         st.error(f"Erreur inattendue : {e}")
 
+@profiled("auth")
 def handle_signup(email, password):
     try:
-        response = supabase.auth.sign_up({"email": email, "password": password})
+        response = get_auth_client().auth.sign_up({"email": email, "password": password})
         if response.user:
             st.session_state.user = response.user
             st.success("Compte créé avec succès ! Vous êtes connecté.")
             st.rerun()
-    except AuthApiError as e:
+    except auth_errors() as e:
         st.error(f"Erreur d'inscription : {e}")
 
+@profiled("auth")
 def handle_logout():
-    supabase.auth.sign_out()
+    # Vide la file d'écriture avant de quitter
+    if 'save_queue' in st.session_state:
+        st.session_state.active_until = None   # libère le compte pour le rollover
+        save_data_to_db()
+        if not st.session_state.save_queue.close():
+            st.error(f"Sauvegarde impossible : {st.session_state.save_queue.last_error}")
+            return
+    if 'auth_client' in st.session_state:
+        st.session_state.auth_client.auth.sign_out()
     st.session_state.user = None
     # Reset des données locales
-    for key in ['tasks', 'logs', 'user_xp', 'data_loaded']:
+    for key in ['tasks', 'logs', 'user_xp', 'data_loaded', 'bootstrap', 'saver', 'save_queue', 'auth_client', 'caught_up']:
         if key in st.session_state:
             del st.session_state[key]
     st.rerun()
@@ -192,17 +314,24 @@ USER_ID = st.session_state.user.id
 
 # --- GESTION PERSISTANCE & ABONNEMENT ---
 
+USER_ROW_TIMEOUT = 10.0   # s ; au-delà, l'écran d'attente propose de réessayer
+# Bail d'activité écrit dans le document (`active_until`, UTC) : le rollover
+# nocturne (rollover.py) ne réécrit pas un compte dont une session est ouverte
+SESSION_LEASE = timedelta(minutes=30)
+
+@profiled("load_data")
 def load_data_from_db():
-    """Charge les données JSON depuis Supabase dans le session_state"""
-    if not DB_CONNECTED: return
-    
+    """Charge les données JSON depuis le backend (Supabase ou SQLite local) dans le session_state.
+
+    La ligne joueur est lue par le bootstrap de la session ; TimeoutError si elle
+    n'est pas arrivée sous USER_ROW_TIMEOUT (la requête continue en arrière-plan).
+    """
     try:
-        response = supabase.table(TABLE_NAME).select("data").eq("user_id", USER_ID).execute()
+        data, logs = st.session_state.bootstrap.result("user_data", USER_ROW_TIMEOUT)
         
-        if response.data and len(response.data) > 0:
-            data = response.data[0]['data']
+        if data is not None:
             st.session_state.tasks = data.get('tasks', [])
-            st.session_state.logs = data.get('logs', [])
+            st.session_state.logs = logs
             st.session_state.user_xp = data.get('user_xp', 0)
             st.session_state.user_lvl = data.get('user_lvl', 1)
             st.session_state.game_mode = data.get('game_mode', "Séide")
@@ -224,16 +353,16 @@ def load_data_from_db():
             st.session_state.trial_start_date = datetime.now().isoformat()
             save_data_to_db() 
             
+    except TimeoutError:
+        raise
     except Exception as e:
         st.error(f"Erreur chargement DB: {e}")
 
-def save_data_to_db():
-    """Sauvegarde tout l'état actuel dans la colonne JSONB"""
-    if not DB_CONNECTED: return
-
-    payload = {
+def get_data_fields():
+    """Champs du document JSONB, hors journal"""
+    return {
         "tasks": st.session_state.get('tasks', []),
-        "logs": st.session_state.get('logs', []),
+        "log_segments": st.session_state.logs.segments_payload() if 'logs' in st.session_state else [],
         "user_xp": st.session_state.get('user_xp', 0),
         "user_lvl": st.session_state.get('user_lvl', 1),
         "game_mode": st.session_state.get('game_mode', "Séide"),
@@ -242,41 +371,68 @@ def save_data_to_db():
         "user_birth_year": st.session_state.get('user_birth_year', 2000),
         "user_consent": st.session_state.get('user_consent', False),
         "is_premium": st.session_state.get('is_premium', False),
-        "trial_start_date": st.session_state.get('trial_start_date', datetime.now().isoformat())
+        "trial_start_date": st.session_state.get('trial_start_date', datetime.now().isoformat()),
+        "active_until": st.session_state.get('active_until')
     }
-    
+
+def lease_expired():
+    """Bail d'activité écoulé : le rollover a pu réécrire le compte depuis le chargement"""
+    until = st.session_state.get('active_until')
+    return until is not None and datetime.fromisoformat(until) <= datetime.now(timezone.utc)
+
+@profiled("save")
+def save_data_to_db():
+    """Met en file l'écriture de ce qui a changé ; l'envoi part en arrière-plan (storage/queue.py)"""
+    if lease_expired():
+        # État d'avant un éventuel rollover : rien n'est écrit, renew_session_lease recharge la ligne
+        return
     try:
-        supabase.table(TABLE_NAME).upsert({
-            "user_id": USER_ID,
-            "data": payload
-        }).execute()
+        st.session_state.save_queue.submit(get_data_fields(), st.session_state.logs)
     except Exception as e:
         st.error(f"Erreur sauvegarde DB: {e}")
 
 def reset_user_data():
     """Réinitialise complètement le profil utilisateur"""
     st.session_state.tasks = []
-    st.session_state.logs = []
+    st.session_state.logs = LogStore()
     st.session_state.user_xp = 0
     st.session_state.user_lvl = 1
     # On garde le mode de jeu, la date, le profil et le consentement
     save_data_to_db()
 
+GENDERS = ["Homme", "Femme", "Autre", "Non précisé"]
+
+def import_history(uploaded):
+    """Remplace l'historique par celui du fichier, rejoué par le moteur -> (rapport, erreur)"""
+    state = get_player_state()
+    try:
+        fields, logs, report = read_import(format_from_name(uploaded.name), uploaded, state.current_date)
+    except ValueError as e:
+        return None, f"Fichier illisible : {e}"
+    if not logs:
+        return report, "Aucune entrée valide : historique inchangé."
+
+    state, logs = replay_import(state, PROG, fields, logs)
+    apply_transition(state)
+    st.session_state.logs = LogStore.from_list(logs).compact(state.current_date)
+    profile = fields.get('profile', {})
+    if profile.get('gender') in GENDERS:
+        st.session_state.user_gender = profile['gender']
+    if isinstance(profile.get('birth_year'), int) and 1900 <= profile['birth_year'] <= 2025:
+        st.session_state.user_birth_year = profile['birth_year']
+    save_data_to_db()
+    return report, None
+
 # --- GESTION CITATIONS ---
+QUOTE_TYPES = ("reussite", "echec")
+
+@st.cache_resource
+def get_citation_cache():
+    """Réserves de citations par type, partagées entre toutes les sessions"""
+    return CitationCache(get_backend().fetch_citations)
 
 def get_random_quote(quote_type):
-    if not DB_CONNECTED: return None
-    try:
-        response = supabase.table("citations").select("text, author").eq("type", quote_type).execute()
-        if response.data and len(response.data) > 0:
-            choice = random.choice(response.data)
-            return choice
-        else:
-            print(f"⚠️ Aucune citation trouvée dans la DB pour le type: '{quote_type}'. Vérifier RLS.")
-            return None
-    except Exception as e:
-        print(f"❌ Erreur fetch citation: {e}")
-        return None
+    return get_citation_cache().get_random(quote_type)
 
 def set_active_quote(quote_data):
     if quote_data:
@@ -285,10 +441,20 @@ def set_active_quote(quote_data):
             "author": quote_data['author']
         }
 
+def start_bootstrap():
+    """Lance ensemble les lectures indépendantes de la session : ligne joueur et
+    réserves de citations absentes du cache. L'abonnement (is_premium, essai) est
+    lu dans la ligne joueur : pas d'appel séparé."""
+    boot = Bootstrap(get_bootstrap_pool())
+    boot.submit("user_data", st.session_state.saver.load)
+    for quote_type in QUOTE_TYPES:
+        get_citation_cache().prefetch(quote_type, functools.partial(boot.submit, f"citations.{quote_type}"))
+    st.session_state.bootstrap = boot
+
 # --- INITIALISATION SESSION STATE (POST-LOGIN) ---
-if 'data_loaded' not in st.session_state:
+if 'bootstrap' not in st.session_state:
     st.session_state.tasks = []
-    st.session_state.logs = []
+    st.session_state.logs = LogStore()
     st.session_state.user_xp = 0
     st.session_state.user_lvl = 1
     st.session_state.game_mode = "Séide"
@@ -302,11 +468,67 @@ if 'data_loaded' not in st.session_state:
     st.session_state.active_quote = None 
     st.session_state.reset_step = 0
     st.session_state.editing_task_id = None 
-    
-    load_data_from_db()
+    st.session_state.saver = DeltaSaver(get_backend(), USER_ID)
+    st.session_state.save_queue = WriteBehindQueue(st.session_state.saver)
+    start_bootstrap()
+
+if 'data_loaded' not in st.session_state:
+    try:
+        load_data_from_db()
+    except TimeoutError:
+        st.warning("⏳ La base de données tarde à répondre : chargement toujours en cours.")
+        st.button("Réessayer")
+        st.stop()
     st.session_state.data_loaded = True
 
+def track_memory():
+    """Activité et empreinte de la session ; déclenche au besoin le déchargement des sessions inactives.
+    Appelée avant tout accès au journal (début de rerun, de fragment, callbacks)."""
+    memory = get_session_memory()
+    memory.touch(st.session_state.memory_session, USER_ID, st.session_state.logs, (st.session_state.tasks,))
+    memory.maybe_sweep()
+
+if 'memory_session' not in st.session_state:
+    st.session_state.memory_session = uuid.uuid4().hex[:8]
+track_memory()
+
+def reload_session_data():
+    """Abandonne l'état de la session (et sa file d'écriture) et relit la ligne joueur"""
+    if 'save_queue' in st.session_state:
+        st.session_state.save_queue.discard()
+    for key in ['bootstrap', 'data_loaded', 'caught_up', 'active_until', 'saver', 'save_queue']:
+        st.session_state.pop(key, None)
+    st.rerun()
+
+def renew_session_lease():
+    """Prolonge le bail d'activité quand il a consommé la moitié de sa durée
+    (au plus une petite écriture par quart d'heure et par session active).
+    Bail expiré (onglet resté ouvert) : la ligne est rechargée avant toute écriture"""
+    if lease_expired():
+        reload_session_data()
+    now = datetime.now(timezone.utc)
+    until = st.session_state.get('active_until')
+    if until is None or datetime.fromisoformat(until) - now < SESSION_LEASE / 2:
+        st.session_state.active_until = (now + SESSION_LEASE).isoformat(timespec="seconds")
+        save_data_to_db()
+
+renew_session_lease()
+
+def get_save_status():
+    """Résumé de l'état de la file d'écriture pour l'en-tête"""
+    queue = st.session_state.get('save_queue')
+    if queue is None:
+        return "💾 Hors ligne"
+    if queue.failures:
+        return f"⚠️ Sauvegarde en échec ({queue.failures}x), nouvel essai en cours"
+    if queue.pending:
+        return "💾 Sauvegarde en attente"
+    if queue.last_flushed_at:
+        return f"💾 Sauvegardé à {datetime.fromtimestamp(queue.last_flushed_at).strftime('%H:%M:%S')}"
+    return "💾 À jour"
+
 # --- LOGIQUE DE BLOCAGE (FIN D'ESSAI) ---
+@profiled("subscription")
 def check_subscription_status():
     """Vérifie si l'utilisateur peut accéder à l'app"""
     if st.session_state.is_premium:
@@ -347,153 +569,137 @@ if not access_granted:
     st.stop() # Arrête le reste de l'app
 
 # --- CONSTANTES & LOGIQUE XP ---
-FIXED_TASK_XP = 229
-
-def get_level_cost(level):
-    exponent = 1.2
-    coeff = 30
-    if level <= 5: coeff = 150
-    elif 6 <= level <= 10: coeff = 80
-    return coeff * (level ** exponent)
-
-def get_total_xp_required(target_level):
-    if target_level == 1: return 0
-    if target_level == 100: return get_total_xp_required(99) * 2
-    total = 0
-    for lvl in range(1, target_level):
-        total += get_level_cost(lvl)
-    return total
+FIXED_TASK_XP = PROG.task_xp
+# Courbe d'XP, titres et slots : voir progression.py / config.json
+# Règles du jeu : voir engine/ ; les fonctions ci-dessous adaptent le session_state
 
 # --- FONCTIONS LOGIQUES ---
 
+def get_player_state():
+    return PlayerState(
+        tasks=tuple(st.session_state.tasks),
+        user_xp=st.session_state.user_xp,
+        user_lvl=st.session_state.user_lvl,
+        game_mode=st.session_state.game_mode,
+        current_date=st.session_state.current_date
+    )
+
+def apply_transition(state, log=None, events=()):
+    """Reporte le résultat d'une transition du moteur dans le session_state"""
+    st.session_state.tasks = list(state.tasks)
+    st.session_state.user_xp = state.user_xp
+    st.session_state.user_lvl = state.user_lvl
+    st.session_state.game_mode = state.game_mode
+    st.session_state.current_date = state.current_date
+    if log is not None:
+        st.session_state.logs.add(log)
+    for event in events:
+        if event.kind == "quote_needed":
+            set_active_quote(get_random_quote(event.data['quote_type']))
+
 def get_current_rank_info():
-    lvl = st.session_state.user_lvl
-    current_title = "Inconnu"
-    current_color = "#000000"
-    for t_lvl, t_name, t_color in TITLES:
-        if lvl >= t_lvl:
-            current_title = t_name
-            current_color = t_color
-        else:
-            break
-    return current_title, current_color
+    return PROG.rank_for_level(st.session_state.user_lvl)
 
 def get_max_slots():
-    return 5 + (st.session_state.user_lvl // 10)
+    return PROG.max_slots(st.session_state.user_lvl)
 
 def get_tasks():
     return st.session_state.tasks
 
 def add_task(name):
-    if len(st.session_state.tasks) >= get_max_slots():
+    state, events = engine.add_task(get_player_state(), PROG, name)
+    if events:
         return False, "Nombre maximum de slots atteint pour votre niveau !"
-    
-    new_id = len(st.session_state.tasks) + 1 
-    if st.session_state.tasks:
-        new_id = max([t['id'] for t in st.session_state.tasks]) + 1
-        
-    st.session_state.tasks.append({"id": new_id, "name": name})
+    apply_transition(state)
     save_data_to_db() 
     return True, "Tâche ajoutée."
 
 def edit_task(task_id, new_name):
-    for t in st.session_state.tasks:
-        if t['id'] == task_id:
-            t['name'] = new_name
-            break
+    state, _ = engine.edit_task(get_player_state(), task_id, new_name)
+    apply_transition(state)
     st.session_state.editing_task_id = None 
     save_data_to_db()
 
 def delete_task(task_id):
-    st.session_state.tasks = [t for t in st.session_state.tasks if t['id'] != task_id]
+    state, _ = engine.delete_task(get_player_state(), task_id)
+    apply_transition(state)
     save_data_to_db()
 
 def get_daily_log(date):
-    for log in st.session_state.logs:
-        if log['date'] == date:
-            return log
-    return None
-
-def check_levelup(date):
-    current_lvl = st.session_state.user_lvl
-    while True:
-        xp_needed_next = get_total_xp_required(current_lvl + 1)
-        if st.session_state.user_xp >= xp_needed_next:
-            current_lvl += 1
-        else:
-            break
-            
-    if current_lvl > st.session_state.user_lvl:
-        st.session_state.user_lvl = current_lvl
-        log = get_daily_log(date)
-        if log: log['level_up'] = True
-        
-        quote = get_random_quote("reussite")
-        set_active_quote(quote)
+    return st.session_state.logs.get(date)
 
 def validate_task(task_id, date):
-    log = get_daily_log(date)
-    if not log:
-        log = {
-            "date": date, 
-            "tasks_completed": [], 
-            "level_up": False,
-            "xp_snapshot": st.session_state.user_xp 
-        }
-        st.session_state.logs.append(log)
-    
-    if task_id not in log['tasks_completed']:
-        log['tasks_completed'].append(task_id)
-        st.session_state.user_xp += FIXED_TASK_XP
-        log['xp_snapshot'] = st.session_state.user_xp 
-        check_levelup(date)
+    state, log, events = engine.validate_task(get_player_state(), PROG, task_id, date, get_daily_log(date))
+    if events:
+        apply_transition(state, log, events)
         save_data_to_db()
 
-def apply_exalte_penalty(log_entry):
-    if st.session_state.game_mode == "Exalté":
-        total_tasks = len(st.session_state.tasks)
-        completed = len(log_entry['tasks_completed'])
-        
-        if total_tasks > 0 and completed < total_tasks:
-            missed = total_tasks - completed
-            penalty = missed * FIXED_TASK_XP
-            
-            st.session_state.user_xp -= penalty
-            if st.session_state.user_xp < 0:
-                st.session_state.user_xp = 0
-            
-            while st.session_state.user_lvl > 1:
-                threshold_current = get_total_xp_required(st.session_state.user_lvl)
-                if st.session_state.user_xp < threshold_current:
-                    st.session_state.user_lvl -= 1
-                else:
-                    break
-
 def skip_day():
-    current_log = get_daily_log(st.session_state.current_date)
-    if not current_log:
-        current_log = {
-            "date": st.session_state.current_date, 
-            "tasks_completed": [], 
-            "level_up": False,
-            "xp_snapshot": st.session_state.user_xp
-        }
-        st.session_state.logs.append(current_log)
-    
-    apply_exalte_penalty(current_log)
-    current_log['xp_snapshot'] = st.session_state.user_xp
-    
-    total_tasks = len(st.session_state.tasks)
-    completed = len(current_log['tasks_completed'])
-    if total_tasks > 0 and completed < total_tasks:
-        quote = get_random_quote("echec")
-        set_active_quote(quote) 
-
-    curr = datetime.strptime(st.session_state.current_date, "%Y-%m-%d")
-    st.session_state.current_date = (curr + timedelta(days=1)).strftime("%Y-%m-%d")
+    state = get_player_state()
+    apply_transition(*engine.skip_day(state, PROG, get_daily_log(state.current_date)))
+    save_data_to_db()
+
+def catch_up(today):
+    """Rattrape en une passe les jours écoulés depuis la dernière visite"""
+    state = get_player_state()
+    state, logs, events = engine.catch_up_to(state, PROG, today, get_daily_log(state.current_date))
+    if not logs:
+        return
+    for log in logs:
+        st.session_state.logs.add(log)
+    apply_transition(state, events=events)
     save_data_to_db()
 
+def compact_logs(today):
+    """Regroupe l'historique ancien en segments compacts (voir log_store.py)"""
+    compacted = st.session_state.logs.compact(today)
+    if compacted is not st.session_state.logs:
+        st.session_state.logs = compacted
+        save_data_to_db()
+
+# Rattrapage des jours d'absence et compaction, une fois par session après le chargement
+if not st.session_state.get('caught_up'):
+    today = datetime.today().strftime("%Y-%m-%d")
+    catch_up(today)
+    compact_logs(today)
+    st.session_state.caught_up = True
+
+@st.cache_resource
+def get_chart_cache():
+    """PNG du graphique de progression, partagés par le processus (LRU, plafond mémoire)"""
+    return ChartCache()
+
 # --- UI LAYOUT ---
+# En-tête, Quête, Progression et Configuration sont des fragments nommés : une
+# interaction ne relance que son fragment, et une action qui modifie l'état
+# affiché ailleurs relance explicitement les fragments concernés (invalidate).
+# Les actions qui touchent toute la page (citation, tâches, reset...) gardent
+# un st.rerun() complet.
+
+def app_fragment(key):
+    """@st.fragment nommé, chronométré comme une section (voir profiling.py)"""
+    def decorator(fn):
+        timed = profiled(key)(fn)
+
+        @functools.wraps(fn)
+        def run():
+            track_memory()
+            renew_session_lease()
+            if PROFILER.enabled and not st.session_state.get('profile_full_run'):
+                # Rerun limité au fragment : il a sa propre trace
+                trace = PROFILER.start_rerun(st.session_state.profile_session)
+                try:
+                    timed()
+                finally:
+                    trace.finish(f"fragment:{key}")
+            else:
+                timed()
+        return st.fragment(key=key)(run)
+    return decorator
+
+def invalidate(*fragments):
+    """Depuis un callback : ne relance que les fragments indiqués"""
+    st.rerun(list(fragments))
 
 # 0. AFFICHAGE CITATION ACTIVE (Design Note Papier)
 if st.session_state.active_quote:
@@ -515,32 +721,48 @@ if st.session_state.active_quote:
             st.rerun()
 
 # 1. EN-TÊTE
-col_titre, col_logout = st.columns([0.8, 0.2])
-with col_titre:
-    title_name, title_color = get_current_rank_info()
-    st.markdown(f"<h3 style='text-align: center; color: {title_color}; font-family: Patrick Hand, cursive;'>Niveau {st.session_state.user_lvl} - {title_name}</h3>", unsafe_allow_html=True)
-with col_logout:
-    if st.button("Déconnexion", key="logout_top"):
-        handle_logout()
-
-current_level_floor = get_total_xp_required(st.session_state.user_lvl)
-next_level_ceiling = get_total_xp_required(st.session_state.user_lvl + 1)
-xp_in_level = st.session_state.user_xp - current_level_floor
-xp_needed_for_level = next_level_ceiling - current_level_floor
+@app_fragment("header")
+def render_header():
+    col_titre, col_logout = st.columns([0.8, 0.2])
+    with col_titre:
+        title_name, title_color = get_current_rank_info()
+        st.markdown(f"<h3 style='text-align: center; color: {title_color}; font-family: Patrick Hand, cursive;'>Niveau {st.session_state.user_lvl} - {title_name}</h3>", unsafe_allow_html=True)
+    with col_logout:
+        if st.button("Déconnexion", key="logout_top"):
+            handle_logout()
+
+    current_level_floor = PROG.get_total_xp_required(st.session_state.user_lvl)
+    next_level_ceiling = PROG.get_total_xp_required(st.session_state.user_lvl + 1)
+    xp_in_level = st.session_state.user_xp - current_level_floor
+    xp_needed_for_level = next_level_ceiling - current_level_floor
+
+    if xp_needed_for_level > 0:
+        progress_val = min(max(xp_in_level / xp_needed_for_level, 0.0), 1.0)
+    else:
+        progress_val = 1.0
 
-if xp_needed_for_level > 0:
-    progress_val = min(max(xp_in_level / xp_needed_for_level, 0.0), 1.0)
-else:
-    progress_val = 1.0
+    st.progress(progress_val)
+    st.caption(f"XP: {int(st.session_state.user_xp)} / {int(next_level_ceiling)} (Total) | {status_msg} | {get_save_status()}")
 
-st.progress(progress_val)
-st.caption(f"XP: {int(st.session_state.user_xp)} / {int(next_level_ceiling)} (Total) | {status_msg}")
+render_header()
 
 # 2. TABS
-tabs = st.tabs(["📜 Quête", "📈 Progression", "🛠 Configuration"])
+# on_change="rerun" expose l'onglet ouvert : le corps de Progression (pandas/matplotlib)
+# n'est exécuté que lorsqu'il est affiché
+tabs = st.tabs(["📜 Quête", "📈 Progression", "🛠 Configuration"], key="main_tabs", on_change="rerun")
 
 # --- TAB QUÊTE ---
-with tabs[0]:
+def on_validate(task_id):
+    track_memory()
+    quote = st.session_state.active_quote
+    validate_task(task_id, st.session_state.current_date)
+    if st.session_state.active_quote is not quote:
+        # Citation de lvl up : affichée au-dessus des fragments
+        st.rerun()
+    invalidate("header", "quests")
+
+@app_fragment("quests")
+def render_quests():
     st.subheader(f"Journal du {st.session_state.current_date}")
     
     tasks = get_tasks()
@@ -564,9 +786,7 @@ with tabs[0]:
             if is_done:
                 st.success("Validé")
             else:
-                if st.button("Valider", key=f"val_{task['id']}"):
-                    validate_task(task['id'], st.session_state.current_date)
-                    st.rerun()
+                st.button("Valider", key=f"val_{task['id']}", on_click=on_validate, args=(task['id'],))
 
     st.divider()
 
@@ -581,81 +801,76 @@ with tabs[0]:
         with c2:
             if st.button("TEST CONNEXION CITATIONS"):
                 test_type = "reussite"
-                q = get_random_quote(test_type)
+                # Force un aller-retour DB plutôt que de servir le cache
+                connected = get_citation_cache().refresh(test_type)
+                q = get_random_quote(test_type) if connected else None
                 if q:
                     set_active_quote(q) 
                     st.success(f"Connexion OK ! Citation chargée.")
                     st.rerun()
+                elif connected:
+                    st.warning(f"Connexion OK, mais aucune citation de type '{test_type}'.")
                 else:
                     st.error("Échec connexion.")
 
+        # Rapport de démarrage : coût des imports différés dans ce processus
+        if IMPORT_TIMES:
+            st.caption("Imports différés : " + ", ".join(f"{m} {t * 1000:.0f} ms" for m, t in IMPORT_TIMES.items()))
+        if DB_CONNECTED:
+            pool = get_http_pool()[1].snapshot()
+            st.caption(f"Pool HTTP : {pool['requests']} requêtes, {pool['new_connections']} connexions ouvertes, "
+                       f"{pool['reused']} réutilisées ({pool['reuse_rate']:.0%})")
+
+with tabs[0]:
+    render_quests()
+
 # --- TAB PROGRESSION ---
-with tabs[1]:
+@app_fragment("chart")
+def render_chart():
     st.header("Graphique")
-    
-    df_logs = pd.DataFrame(st.session_state.logs)
-    
-    if not df_logs.empty:
-        df_logs['date_dt'] = pd.to_datetime(df_logs['date'])
-        df_logs = df_logs.sort_values('date_dt')
-        
-        current_total_tasks = max(len(st.session_state.tasks), 1)
-        
-        def get_status_color(row):
-            count = len(row['tasks_completed'])
-            if count == 0: return 'red'
-            if count >= current_total_tasks: return 'green'
-            return 'orange'
-            
-        df_logs['color'] = df_logs.apply(get_status_color, axis=1)
 
+    PERIODS = {"Tout": None, "30 jours": 30, "90 jours": 90, "1 an": 365}
+    period = st.selectbox("Période", list(PERIODS), key="chart_period")
+    period_start = None
+    if PERIODS[period]:
+        curr = datetime.strptime(st.session_state.current_date, "%Y-%m-%d")
+        period_start = (curr - timedelta(days=PERIODS[period])).strftime("%Y-%m-%d")
+
+    if st.session_state.logs.count_between(period_start):
         st.caption("Filtres du graphique :")
         col_l1, col_l2, col_l3, col_l4, col_l5 = st.columns(5)
-        
+    
         show_curve = col_l1.checkbox("🟦 Courbe", True)
         show_100 = col_l2.checkbox("🟢 Tâches réalisées", True)
         show_mid = col_l3.checkbox("🟠 Tâches partielles", True)
         show_0 = col_l4.checkbox("🔴 Aucune tâche", True)
         show_lvlup = col_l5.checkbox("⚫ Lvl Up !", True)
 
-        with plt.xkcd():
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            if show_curve:
-                ax.plot(df_logs['date_dt'], df_logs['xp_snapshot'], color='blue', alpha=0.5, linewidth=2)
-            
-            for _, row in df_logs.iterrows():
-                date_val = row['date_dt']
-                xp_val = row['xp_snapshot']
-                color = row['color']
-                is_lvl_up = row['level_up']
-                
-                if is_lvl_up and show_lvlup:
-                     ax.scatter([date_val], [xp_val], color='black', s=200, marker='*', zorder=10)
-                
-                if color == 'green' and show_100:
-                    ax.scatter([date_val], [xp_val], color='green', s=100, zorder=5)
-                elif color == 'orange' and show_mid:
-                    ax.scatter([date_val], [xp_val], color='orange', s=100, zorder=5)
-                elif color == 'red' and show_0:
-                    ax.scatter([date_val], [xp_val], color='red', s=100, zorder=5)
-
-            ax.set_ylabel("XP Totale")
-            ax.set_xlabel("Date")
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            
-            fig.autofmt_xdate()
-            fig.patch.set_alpha(0)
-            ax.patch.set_alpha(0)
-            
-            st.pyplot(fig)
-            
+        filters = (show_curve, show_100, show_mid, show_0, show_lvlup)
+        fingerprint = chart_fingerprint(st.session_state.logs, len(st.session_state.tasks), period_start, filters)
+    
+        def render():
+            # Colonnes déjà triées par date, segments compactés compris
+            df_logs = build_chart_frame(st.session_state.logs.columns().view(period_start), len(st.session_state.tasks))
+            return render_chart_png(df_logs, *filters)
+    
+        st.image(get_chart_cache().get_or_render(USER_ID, fingerprint, render), width="stretch")
+        
     else:
         st.info("Synchronisation DB... ou aucune donnée disponible.")
 
+if tabs[1].open:
+    with tabs[1]:
+        render_chart()
+
 # --- TAB CONFIGURATION ---
-with tabs[2]:
+def on_import():
+    track_memory()
+    st.session_state.import_result = import_history(st.session_state.import_file)
+    invalidate("header", "quests", "config")
+
+@app_fragment("config")
+def render_config():
     st.header("Configuration")
 
     # 1. Mode de Jeu (En haut)
@@ -722,7 +937,7 @@ with tabs[2]:
     st.subheader("Mon Profil")
     c_genre, c_annee = st.columns(2)
     with c_genre:
-        new_gender = st.selectbox("Genre", ["Homme", "Femme", "Autre", "Non précisé"], index=["Homme", "Femme", "Autre", "Non précisé"].index(st.session_state.user_gender) if st.session_state.user_gender in ["Homme", "Femme", "Autre", "Non précisé"] else 3)
+        new_gender = st.selectbox("Genre", GENDERS, index=GENDERS.index(st.session_state.user_gender) if st.session_state.user_gender in GENDERS else 3)
     with c_annee:
         new_year = st.number_input("Année de naissance", min_value=1900, max_value=2025, value=st.session_state.user_birth_year)
     
@@ -761,24 +976,43 @@ with tabs[2]:
 
         st.markdown("---")
         st.markdown("#### Export de données")
-        # Export JSON simple
-        user_data_json = json.dumps({
-            "tasks": st.session_state.tasks,
-            "logs": st.session_state.logs,
+        # Export généré seulement au clic (callable) : voir export.py
+        export_format = st.selectbox("Format", list(EXPORT_FORMATS), key="export_format",
+                                     help="NDJSON et CSV : journal uniquement, une ligne par jour")
+        extension, mime = EXPORT_FORMATS[export_format]
+        export_fields = {
+            "tasks": list(st.session_state.tasks),
             "xp": st.session_state.user_xp,
             "profile": {
                 "gender": st.session_state.user_gender,
                 "birth_year": st.session_state.user_birth_year
             }
-        }, indent=2)
+        }
+        export_logs = st.session_state.logs
         
         st.download_button(
-            label="📥 Exporter mes données (JSON)",
-            data=user_data_json,
-            file_name=f"taskrpg_export_{USER_ID}.json",
-            mime="application/json"
+            label=f"📥 Exporter mes données ({export_format})",
+            data=lambda: export_bytes(export_format, export_fields, export_logs.history()),
+            file_name=f"taskrpg_export_{USER_ID}.{extension}",
+            mime=mime
         )
 
+        st.markdown("#### Import de données")
+        uploaded = st.file_uploader("Restaurer un historique (JSON, NDJSON ou CSV)",
+                                    type=["json", "ndjson", "jsonl", "csv"], key="import_file")
+        if uploaded is not None:
+            st.button("📤 Importer (remplace tout l'historique)", on_click=on_import)
+        if 'import_result' in st.session_state:
+            report, error = st.session_state.pop('import_result')
+            if error:
+                st.error(error)
+            else:
+                st.success(f"{report.imported} jours importés ({report.duplicates} doublons ignorés). "
+                           f"XP et niveau recalculés : {st.session_state.user_xp} XP, niveau {st.session_state.user_lvl}.")
+            if report is not None and report.error_count:
+                st.warning(f"{report.error_count} entrées rejetées : " +
+                           "; ".join(f"{where} : {msg}" for where, msg in report.errors))
+
     st.divider()
 
     # 5. Zone Danger (Tout en bas)
@@ -800,6 +1034,23 @@ with tabs[2]:
                 st.session_state.reset_step = 0
                 st.rerun()
 
+with tabs[2]:
+    render_config()
+
+# --- PANNEAU DE PROFILAGE (caché hors profilage) ---
+if PROFILER.enabled:
+    with st.sidebar.expander("⏱️ Profilage"):
+        st.caption("Ce rerun (jusqu'ici)")
+        st.json(st.session_state.profile_trace.summary(), expanded=False)
+        st.caption("Processus : p50 / p95 par section et par appel DB")
+        st.dataframe(PROFILER.stats(), hide_index=True)
+        st.caption("Chargement de la session (lectures parallèles)")
+        st.json(st.session_state.bootstrap.report(), expanded=False)
+        st.caption(f"Mémoire des sessions (graphiques en cache : {get_chart_cache().total_bytes} o)")
+        st.json(get_session_memory().report(), expanded=False)
+    st.session_state.profile_trace.finish()
+    st.session_state.profile_full_run = False
+
 # --- DEPENDANCES (requirements.txt) ---
 # streamlit
 # pandas
@@ -0,0 +1,95 @@
+"""Benchmark du démarrage de session : lectures séquentielles vs bootstrap concurrent.
+
+Usage : python benchmarks/bench_bootstrap.py [--latency 80] [--days 1000] [--repeat 5]
+Le backend est un MemoryBackend dont chaque appel attend `--latency` ms (lien
+lent simulé). « Séquentiel » enchaîne la ligne joueur puis chaque réserve de
+citations, comme avant ; « bootstrap » les lance ensemble et n'attend que la
+ligne joueur avant le premier affichage.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_chart import make_logs  # noqa: E402
+from bootstrap import Bootstrap  # noqa: E402
+from citations import CitationCache  # noqa: E402
+from storage import DeltaSaver, MemoryBackend  # noqa: E402
+
+QUOTE_TYPES = ("reussite", "echec")
+
+
+class SlowBackend:
+    """MemoryBackend avec une latence fixe par appel"""
+
+    def __init__(self, backend, latency):
+        self.backend = backend
+        self.latency = latency
+
+    def __getattr__(self, name):
+        method = getattr(self.backend, name)
+
+        def call(*args):
+            time.sleep(self.latency)
+            return method(*args)
+        return call
+
+
+def make_backend(days, latency):
+    quotes = [{"text": f"Citation {i}", "author": "Anonyme"} for i in range(50)]
+    backend = MemoryBackend(citations={t: quotes for t in QUOTE_TYPES})
+    backend.save("u1", {"tasks": [], "logs": make_logs(days), "user_xp": 0, "user_lvl": 1})
+    return SlowBackend(backend, latency)
+
+
+def sequential(backend):
+    """Premier affichage, puis premier lvl up (citation chargée à la demande)"""
+    t0 = time.perf_counter()
+    DeltaSaver(backend, "u1").load()
+    first_paint = time.perf_counter() - t0
+    cache = CitationCache(backend.fetch_citations)
+    for quote_type in QUOTE_TYPES:
+        cache.get_random(quote_type)
+    return first_paint, time.perf_counter() - t0
+
+
+def concurrent(backend, pool):
+    t0 = time.perf_counter()
+    boot = Bootstrap(pool)
+    cache = CitationCache(backend.fetch_citations)
+    boot.submit("user_data", DeltaSaver(backend, "u1").load)
+    for quote_type in QUOTE_TYPES:
+        cache.prefetch(quote_type, lambda fn, t=quote_type: boot.submit(f"citations.{t}", fn))
+    boot.result("user_data", 10.0)
+    first_paint = time.perf_counter() - t0
+    for quote_type in QUOTE_TYPES:
+        cache.get_random(quote_type)
+    return first_paint, time.perf_counter() - t0, boot.report()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=80, help="latence par appel (ms)")
+    parser.add_argument("--days", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    backend = make_backend(args.days, args.latency / 1000)
+    pool = ThreadPoolExecutor(max_workers=8)
+    seq = [sequential(backend) for _ in range(args.repeat)]
+    conc = [concurrent(backend, pool) for _ in range(args.repeat)]
+    pool.shutdown()
+
+    print(f"Latence simulée : {args.latency:.0f} ms par appel, {args.days} jours d'historique")
+    print(f"{'':<12}{'1er affichage':>16}{'citations prêtes':>20}")
+    for name, runs in (("séquentiel", seq), ("bootstrap", conc)):
+        print(f"{name:<12}{statistics.median(r[0] for r in runs) * 1000:>13.1f} ms"
+              f"{statistics.median(r[1] for r in runs) * 1000:>17.1f} ms")
+    print(f"Rapport du dernier bootstrap : {conc[-1][2]}")
+
+
+if __name__ == "__main__":
+    main()
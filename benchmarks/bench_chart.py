@@ -0,0 +1,100 @@
+"""Benchmark du graphique de progression : boucle iterrows historique vs rendu vectorisé.
+
+Usage : python benchmarks/bench_chart.py [--sizes 100 1000 10000] [--repeat 3]
+Chaque mesure couvre la préparation du DataFrame, la construction de la figure
+et son rendu PNG (ce que fait st.pyplot).
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from charts import build_chart_frame, render_progression_chart  # noqa: E402
+from log_store import LogStore  # noqa: E402
+
+TOTAL_TASKS = 5
+
+
+def make_logs(n_days, seed=0):
+    """Historique synthétique de `n_days` jours"""
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    xp = 0
+    logs = []
+    for i in range(n_days):
+        done = rng.randint(0, TOTAL_TASKS)
+        xp += done * 229
+        logs.append({
+            "date": (start + timedelta(days=i)).strftime("%Y-%m-%d"),
+            "tasks_completed": list(range(1, done + 1)),
+            "level_up": rng.random() < 0.05,
+            "xp_snapshot": xp
+        })
+    return logs
+
+
+def legacy_chart(logs, total_tasks):
+    """Implémentation d'origine (apply + une paire de scatter par jour)"""
+    df_logs = pd.DataFrame(logs)
+    df_logs['date_dt'] = pd.to_datetime(df_logs['date'])
+    df_logs = df_logs.sort_values('date_dt')
+    current_total_tasks = max(total_tasks, 1)
+
+    def get_status_color(row):
+        count = len(row['tasks_completed'])
+        if count == 0: return 'red'
+        if count >= current_total_tasks: return 'green'
+        return 'orange'
+
+    df_logs['color'] = df_logs.apply(get_status_color, axis=1)
+    with plt.xkcd():
+        fig, ax = plt.subplots(figsize=(10, 6))
+        ax.plot(df_logs['date_dt'], df_logs['xp_snapshot'], color='blue', alpha=0.5, linewidth=2)
+        for _, row in df_logs.iterrows():
+            if row['level_up']:
+                ax.scatter([row['date_dt']], [row['xp_snapshot']], color='black', s=200, marker='*', zorder=10)
+            ax.scatter([row['date_dt']], [row['xp_snapshot']], color=row['color'], s=100, zorder=5)
+        fig.autofmt_xdate()
+    return fig
+
+
+def vectorized_chart(logs, total_tasks):
+    return render_progression_chart(build_chart_frame(LogStore.from_list(logs).columns().view(), total_tasks))
+
+
+def timed(fn, logs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fig = fn(logs, TOTAL_TASKS)
+        fig.savefig(io.BytesIO(), format="png")
+        best = min(best, time.perf_counter() - t0)
+        plt.close(fig)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'jours':>8} {'boucle (s)':>12} {'vectorisé (s)':>14} {'gain':>8}")
+    for n_days in args.sizes:
+        logs = make_logs(n_days)
+        t_legacy = timed(legacy_chart, logs, args.repeat)
+        t_vec = timed(vectorized_chart, logs, args.repeat)
+        print(f"{n_days:>8} {t_legacy:>12.3f} {t_vec:>14.3f} {t_legacy / t_vec:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark du journal en session : liste de dicts vs colonnes NumPy (LogColumns).
+
+Usage : python benchmarks/bench_log_columns.py [--days 10000] [--repeat 5]
+Compare la mémoire occupée, la construction du DataFrame du graphique à
+chaque rerun (pd.DataFrame + to_datetime + sort_values d'un côté, vue sans
+copie de l'autre) et le coût d'un ajout de jour.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_chart import TOTAL_TASKS, make_logs  # noqa: E402
+from charts import build_chart_frame  # noqa: E402
+from log_store import LogStore  # noqa: E402
+
+
+def legacy_frame(logs):
+    """Ce que faisait l'onglet Progression à chaque rerun"""
+    df_logs = pd.DataFrame(logs)
+    df_logs['date_dt'] = pd.to_datetime(df_logs['date'])
+    return df_logs.sort_values('date_dt')
+
+
+def columns_frame(store):
+    return build_chart_frame(store.columns().view(), TOTAL_TASKS)
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def allocated(build):
+    """Octets alloués (et encore vivants) par `build()`"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def append_cost(store, n=1000):
+    """Temps moyen d'un ajout de jour, colonnes déjà construites"""
+    store.columns()
+    last = date.fromisoformat(store.last()['date'])
+    t0 = time.perf_counter()
+    for i in range(1, n + 1):
+        store.add({
+            "date": (last + timedelta(days=i)).isoformat(),
+            "tasks_completed": [1],
+            "level_up": False,
+            "xp_snapshot": 229 * i
+        })
+    return (time.perf_counter() - t0) / n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    logs = make_logs(args.days)
+    store = LogStore.from_list(logs)
+    columns = store.columns()
+
+    mem_dicts = allocated(lambda: make_logs(args.days))
+    mem_columns = columns.nbytes()
+    t_legacy = best_of(lambda: legacy_frame(logs), args.repeat)
+    t_columns = best_of(lambda: columns_frame(store), args.repeat)
+    t_build = best_of(lambda: LogStore.from_list(logs).columns(), args.repeat)
+
+    df_logs = columns_frame(store)
+    zero_copy = np.shares_memory(df_logs['xp_snapshot'].to_numpy(), columns.xp_snapshots)
+
+    print(f"{args.days} jours")
+    print(f"  mémoire      liste de dicts {mem_dicts / 1024:>9.0f} Ko   colonnes {mem_columns / 1024:>7.0f} Ko")
+    print(f"  DataFrame    liste de dicts {t_legacy * 1000:>9.2f} ms   colonnes {t_columns * 1000:>7.2f} ms"
+          f"   ({t_legacy / t_columns:.0f}x, sans copie : {zero_copy})")
+    print(f"  construction des colonnes (une fois par session) : {t_build * 1000:.2f} ms")
+    print(f"  ajout d'un jour : {append_cost(store) * 1e6:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
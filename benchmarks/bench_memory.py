@@ -0,0 +1,89 @@
+"""Benchmark de la mémoire des sessions : empreinte, déchargement des inactives, relecture.
+
+Usage : python benchmarks/bench_memory.py [--sessions 200] [--days 3650] [--spill :memory:]
+Chaque session simulée a un journal compacté de `--days` jours et sa vue
+colonnes (onglet Progression ouvert une fois). Mesure l'empreinte totale
+estimée (SessionMemory) avant et après le déchargement de toutes les
+sessions, le RSS (la mémoire libérée reste à l'allocateur du processus : c'est
+l'ouverture d'un second lot de sessions qui montre sa réutilisation), puis le
+temps de relecture d'un historique au premier accès.
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_chart import make_logs  # noqa: E402
+from benchmarks.load_test import rss_bytes  # noqa: E402
+from log_store import LogStore  # noqa: E402
+from memory import SessionMemory  # noqa: E402
+from storage import SpillStore  # noqa: E402
+
+TASKS = [{"id": i, "name": f"Tâche {i}"} for i in range(1, 6)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--days", type=int, default=3650)
+    parser.add_argument("--spill", help="fichier de déchargement (défaut : fichier temporaire)")
+    args = parser.parse_args(argv)
+
+    clock = [0.0]
+    spill_path = args.spill or os.path.join(tempfile.mkdtemp(), "spill.db")
+    memory = SessionMemory(SpillStore(spill_path), idle_seconds=60, clock=lambda: clock[0])
+
+    # Historique terminé hier : seuls les 90 derniers jours restent en entrées complètes
+    logs = make_logs(args.days)
+    start = date.today() - timedelta(days=args.days)
+    for i, log in enumerate(logs):
+        log['date'] = (start + timedelta(days=i)).isoformat()
+    today = date.today().isoformat()
+
+    def open_sessions(prefix):
+        stores = []
+        for i in range(args.sessions):
+            store = LogStore.from_list([dict(log) for log in logs]).compact(today)
+            store.columns()
+            memory.touch(f"{prefix}{i}", f"u{i}", store, (TASKS,))
+            stores.append(store)
+        gc.collect()
+        return stores
+
+    rss_start = rss_bytes()
+    stores = open_sessions("a")
+    rss_loaded = rss_bytes()
+    loaded = memory.total_bytes()
+
+    clock[0] = 120.0
+    t0 = time.perf_counter()
+    memory.sweep()
+    sweep_s = time.perf_counter() - t0
+    gc.collect()
+    rss_offloaded = rss_bytes()
+    report = memory.report()
+
+    # La mémoire libérée reste au processus (allocateur) : un second lot de sessions la réutilise
+    second = open_sessions("b")
+    rss_second = rss_bytes()
+
+    t0 = time.perf_counter()
+    for store in stores:
+        store.columns()
+    page_in_s = (time.perf_counter() - t0) / len(stores)
+    del second
+
+    print(f"{args.sessions} sessions x {args.days} jours (spill : {spill_path})")
+    print(f"  empreinte estimée : {loaded / 1024:.0f} Ko -> {report['total_bytes'] / 1024:.0f} Ko "
+          f"({report['offloads']} sessions déchargées, {report['spilled_bytes'] / 1024:.0f} Ko sur disque)")
+    print(f"  RSS               : 1er lot +{(rss_loaded - rss_start) / 1024:.0f} Ko, après déchargement "
+          f"+{(rss_offloaded - rss_start) / 1024:.0f} Ko, 2e lot +{(rss_second - rss_offloaded) / 1024:.0f} Ko")
+    print(f"  sweep             : {sweep_s * 1000:.1f} ms ; relecture + colonnes : {page_in_s * 1000:.2f} ms / session")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark du coût serveur d'un clic « Valider » (AppTest, base SQLite jetable).
+
+Usage : python benchmarks/bench_reruns.py [--days 1000] [--clicks 20] [--app app.py] [--chart]
+Mesure le temps CPU du processus (time.process_time) par clic, rerun(s)
+compris, à comparer au rerun complet du script. `--app` permet de mesurer
+une autre version du script (avant/après) ; `--chart` ouvre l'onglet
+Progression pendant la mesure.
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import types
+import warnings
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from benchmarks.bench_chart import TOTAL_TASKS, make_logs  # noqa: E402
+from log_store import LogStore  # noqa: E402
+from storage import SqliteBackend  # noqa: E402
+
+USER_ID = "bench"
+
+
+def seed(path, days):
+    """Joueur avec `days` jours d'historique, le dernier étant hier"""
+    logs = make_logs(days)
+    start = date.today() - timedelta(days=days)
+    for i, log in enumerate(logs):
+        log['date'] = (start + timedelta(days=i)).strftime("%Y-%m-%d")
+    store = LogStore.from_list(logs).compact(date.today().strftime("%Y-%m-%d"))
+    SqliteBackend(path).save(USER_ID, {
+        "tasks": [{"id": i, "name": f"Tâche {i}"} for i in range(1, TOTAL_TASKS + 1)],
+        "logs": store.to_list(),
+        "log_segments": store.segments_payload(),
+        "user_xp": logs[-1]['xp_snapshot'],
+        "user_lvl": 1,
+        "game_mode": "Normal",
+        "current_date": date.today().strftime("%Y-%m-%d"),
+        "user_gender": "Non précisé",
+        "user_birth_year": 2000,
+        "user_consent": True,
+        "is_premium": True,
+        "trial_start_date": "2020-01-01T00:00:00"
+    })
+
+
+def cpu(fn):
+    t0 = time.process_time()
+    fn()
+    return time.process_time() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=1000)
+    parser.add_argument("--clicks", type=int, default=20)
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--chart", action="store_true", help="onglet Progression ouvert")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    logging.disable(logging.WARNING)
+    from streamlit.testing.v1 import AppTest
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["LEVEL_CRUSH_DB"] = os.path.join(tmp, "bench.db")
+        seed(os.environ["LEVEL_CRUSH_DB"], args.days)
+
+        at = AppTest.from_file(os.path.abspath(args.app), default_timeout=120)
+        at.session_state.user = types.SimpleNamespace(id=USER_ID)
+        if args.chart:
+            at.session_state.main_tabs = "📈 Progression"
+        at.run()
+        if at.exception:
+            sys.exit(at.exception[0].value)
+
+        full = [cpu(at.run) for _ in range(args.clicks)]
+        clicks = []
+        for _ in range(args.clicks):
+            buttons = [b for b in at.button if b.label == "Valider"]
+            if not buttons:
+                # Toutes les tâches du jour validées : on repart d'une journée vierge
+                at.session_state.current_date = (date.fromisoformat(at.session_state.current_date)
+                                                 + timedelta(days=1)).strftime("%Y-%m-%d")
+                at.run()
+                continue
+            buttons[0].click()
+            clicks.append(cpu(at.run))
+            if at.exception:
+                sys.exit(at.exception[0].value)
+
+    print(f"{os.path.basename(args.app)} ({args.days} jours, onglet {'Progression' if args.chart else 'Quête'})")
+    print(f"  rerun complet : {statistics.median(full) * 1000:8.2f} ms CPU (médiane sur {len(full)})")
+    print(f"  clic Valider  : {statistics.median(clicks) * 1000:8.2f} ms CPU (médiane sur {len(clicks)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Test de charge : N sessions simulées sur un seul processus app.py.
+
+Usage : python benchmarks/load_test.py [--sessions 10 100 1000] [--rounds 2] [--think 5] [--json out.json]
+
+Chaque session est un AppTest (exécution sans navigateur du script) avec son
+propre user_id ; le backend est la base SQLite en mémoire de l'app
+(LEVEL_CRUSH_DB=:memory:), à la place de Supabase. L'authentification n'est
+pas mesurée : le harnais place directement l'utilisateur dans
+`session_state.user`, sans passer par le formulaire de connexion. Parcours
+d'une session : premier rerun (bootstrap + chargement des données), ajout de
+tâches, puis `--rounds` fois : validation des tâches, « Sauter un jour »,
+ouverture de Progression, édition d'une tâche.
+
+Toutes les sessions restent ouvertes ; leurs reruns sont entrelacés, un à la
+fois. AppTest ne sait pas exécuter deux reruns en parallèle (runtime global),
+et les reruns d'un processus se partagent de toute façon un seul GIL : le
+débit mesuré est le plafond du processus. `--think` (secondes entre deux
+interactions d'un utilisateur) en déduit le nombre de sessions actives
+supportables avant que les reruns ne fassent la queue.
+
+Rapporte par taille : reruns/s, latence par rerun (p50/p95/p99), RSS par
+session, threads, et appels au backend (via ProfiledBackend). Une session de
+chauffe (non comptée) tourne avant la mesure du RSS de départ : les imports
+différés (pandas, matplotlib...) ne sont pas imputés aux sessions.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import logging
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+import types
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+TASK_NAMES = ("Lire 20 pages", "Faire 50 pompes", "Méditer")
+
+
+def rss_bytes():
+    """RSS courant du processus (/proc), à défaut le pic"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentile(sorted_values, q):
+    index = max(int(round(q * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class Session:
+    """Un utilisateur simulé ; chaque étape est un rerun chronométré"""
+
+    def __init__(self, app_test, user_id, latencies):
+        self.at = app_test(APP_PATH, default_timeout=120)
+        # Authentification court-circuitée : utilisateur injecté, formulaire non soumis
+        self.at.session_state.user = types.SimpleNamespace(id=user_id)
+        self.latencies = latencies   # étape -> durées des reruns (s), partagé par les sessions
+        self.step = None
+
+    def run(self):
+        t0 = time.perf_counter()
+        self.at.run()
+        self.latencies.setdefault(self.step, []).append(time.perf_counter() - t0)
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].value)
+
+    def button(self, label):
+        return next((b for b in self.at.button if b.label == label), None)
+
+    def first_run(self):
+        """Premier rerun après connexion : bootstrap et chargement des données"""
+        self.run()
+
+    def add_tasks(self):
+        for name in TASK_NAMES:
+            next(t for t in self.at.text_input if t.label == "Nouvelle tâche").input(name)
+            self.button("Ajouter").click()
+            self.run()
+
+    def validate_tasks(self):
+        while (button := self.button("Valider")) is not None:
+            button.click()
+            self.run()
+
+    def skip_day(self):
+        self.button("Sauter un jour (Skip + Penalty Check)").click()
+        self.run()
+
+    def open_progression(self):
+        self.at.session_state.main_tabs = "📈 Progression"
+        self.run()
+        self.at.session_state.main_tabs = "📜 Quête"
+
+    def edit_task(self):
+        self.button("✏️").click()
+        self.run()
+        next(t for t in self.at.text_input if t.label == "Nom").input(f"Tâche {time.monotonic_ns() % 1000}")
+        self.button("OK").click()
+        self.run()
+
+    def steps(self, rounds):
+        """Parcours complet, une étape (un ou plusieurs reruns) à la fois"""
+        flow = [self.first_run, self.add_tasks]
+        flow += [self.validate_tasks, self.skip_day, self.open_progression, self.edit_task] * rounds
+        for step in flow:
+            self.step = step.__name__
+            yield step
+
+
+def backend_counts(session):
+    """{appel: nombre} cumulés dans le profiler du processus"""
+    backend = session.at.session_state.saver.backend
+    return {s["name"]: s["count"] for s in backend.profiler.stats() if s["name"].startswith("db.")}
+
+
+def run_load(n_sessions, rounds, think, prefix, log=print):
+    from streamlit.testing.v1 import AppTest
+
+    latencies = {}
+    # Les traces du profiler (une ligne JSON par rerun) ne sont pas affichées
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # Chauffe : imports différés et caches du processus, hors mesure
+        warmup = Session(AppTest.from_file, f"{prefix}-warmup", {})
+        for step in warmup.steps(1):
+            step()
+        warmup.at.session_state.save_queue.close()
+        # Profiler partagé par le processus : la chauffe et les tailles précédentes sont retranchées
+        counts_before = backend_counts(warmup)
+        del warmup
+        gc.collect()
+        rss_before = rss_bytes()
+        threads_before = threading.active_count()
+
+        sessions = [Session(AppTest.from_file, f"{prefix}-{i}", latencies) for i in range(n_sessions)]
+        pending = [s.steps(rounds) for s in sessions]
+        t0 = time.perf_counter()
+        while pending:
+            # Une étape par session à chaque tour : toutes les sessions avancent ensemble
+            still_running = []
+            for steps in pending:
+                step = next(steps, None)
+                if step is not None:
+                    step()
+                    still_running.append(steps)
+            pending = still_running
+        elapsed = time.perf_counter() - t0
+        for s in sessions:
+            s.at.session_state.save_queue.flush()
+        counts = diff_counts(backend_counts(sessions[0]), counts_before)
+
+    rss_after = rss_bytes()
+    values = sorted(t for times in latencies.values() for t in times)
+    reruns_per_s = len(values) / elapsed
+    result = {
+        "sessions": n_sessions,
+        "reruns": len(values),
+        "elapsed_s": round(elapsed, 2),
+        "reruns_per_s": round(reruns_per_s, 1),
+        "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(values) * 1000, 2),
+        "rss_per_session_kb": round((rss_after - rss_before) / n_sessions / 1024, 1),
+        "threads_per_session": round((threading.active_count() - threads_before) / n_sessions, 2),
+        "steps_p50_ms": {step: round(statistics.median(times) * 1000, 2) for step, times in latencies.items()},
+        "backend_calls": counts,
+        "max_active_sessions": int(reruns_per_s * think),
+    }
+    log(f"{n_sessions:>6} sessions : {result['reruns']} reruns en {result['elapsed_s']}s "
+        f"({result['reruns_per_s']} reruns/s), p50/p95/p99 {result['p50_ms']}/{result['p95_ms']}/{result['p99_ms']} ms, "
+        f"{result['rss_per_session_kb']} Ko et {result['threads_per_session']} thread(s) par session, "
+        f"~{result['max_active_sessions']} sessions actives à 1 interaction / {think:g}s")
+    return result, sessions
+
+
+def diff_counts(after, before):
+    return {name: count - before.get(name, 0) for name, count in after.items() if count > before.get(name, 0)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--rounds", type=int, default=2, help="tours validation / skip / graphique / édition")
+    parser.add_argument("--think", type=float, default=5.0, help="secondes entre deux interactions d'un utilisateur")
+    parser.add_argument("--json", help="fichier de résultats à écrire")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("LEVEL_CRUSH_DB", ":memory:")
+    os.environ["LEVEL_CRUSH_PROFILE"] = "1"   # ProfiledBackend : comptage des appels au backend
+    warnings.filterwarnings("ignore")
+    logging.disable(logging.WARNING)
+    sys.path.insert(0, ROOT)
+
+    results = []
+    for i, n in enumerate(args.sessions):
+        result, sessions = run_load(n, args.rounds, args.think, prefix=f"load{i}")
+        print("        p50 par étape : " + ", ".join(f"{k} {v} ms" for k, v in result["steps_p50_ms"].items()))
+        print("        appels backend : " + ", ".join(f"{k} {v}" for k, v in sorted(result["backend_calls"].items())))
+        for s in sessions:
+            s.at.session_state.save_queue.close()
+        del sessions
+        results.append(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"rounds": args.rounds, "think_s": args.think, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Suite de benchmarks hors ligne des chemins chauds (moteur, persistance, graphique).
+
+Usage :
+    python benchmarks/suite.py [--quick] [--only engine] [--json results.json]
+    python benchmarks/suite.py --compare base.json [--threshold 1.25]
+    python benchmarks/suite.py --check
+
+Supabase est remplacé par storage.MemoryBackend (et par un SqliteBackend en
+mémoire pour la persistance). Chaque cas est mesuré sur `repeat` répétitions
+(meilleur temps, médiane, moyenne) ; `--json` écrit les résultats sous une
+forme stable, et `--compare` signale les cas dont la médiane a régressé
+au-delà du seuil (code de sortie 1).
+
+`--check` vérifie d'abord, sur chaque backend, qu'un document relu après
+sauvegarde (delta, compaction, import, reset) est bien celui envoyé.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import engine  # noqa: E402
+from benchmarks.bench_chart import TOTAL_TASKS, make_logs  # noqa: E402
+from charts import build_chart_frame, render_chart_png  # noqa: E402
+from engine import PlayerState  # noqa: E402
+from log_store import LogStore  # noqa: E402
+from progression import load_progression  # noqa: E402
+from storage import DeltaSaver, MemoryBackend, SqliteBackend  # noqa: E402
+
+HISTORY_SIZES = (10, 1000, 10000)
+BACKENDS = {"memory": MemoryBackend, "sqlite": lambda: SqliteBackend(":memory:")}
+TASKS = tuple({"id": i, "name": f"Tâche {i}"} for i in range(1, TOTAL_TASKS + 1))
+
+PROG = load_progression()
+
+
+def measure(fn, setup=None, repeat=20, number=1):
+    """Temps (s) par appel de `fn(state)`, `setup()` refait avant chaque répétition"""
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn(state)
+        times.append((time.perf_counter() - t0) / number)
+    return times
+
+
+def player_for(store):
+    last = store.last()
+    return PlayerState(
+        tasks=TASKS,
+        user_xp=last['xp_snapshot'] if last else 0,
+        user_lvl=PROG.level_for_xp(last['xp_snapshot']) if last else 1,
+        game_mode=PROG.penalty_mode,
+        current_date=engine.next_date(last['date']) if last else "2020-01-01"
+    )
+
+
+def data_fields(state, store):
+    """Champs persistés hors journal, comme get_data_fields() de app.py"""
+    return {
+        "tasks": list(state.tasks),
+        "log_segments": store.segments_payload(),
+        "user_xp": state.user_xp,
+        "user_lvl": state.user_lvl,
+        "game_mode": state.game_mode,
+        "current_date": state.current_date,
+        "user_gender": "Non précisé",
+        "user_birth_year": 2000,
+        "user_consent": True,
+        "is_premium": False,
+        "trial_start_date": "2020-01-01T00:00:00"
+    }
+
+
+# --- Cas : chacun renvoie une liste de (nom, params, temps, mesures annexes) ---
+
+def bench_progression(quick):
+    levels = range(1, PROG.max_level + 1)
+    xps = [PROG.get_total_xp_required(lvl) + 1 for lvl in levels]
+    n = 20 if quick else 200
+    yield ("progression.get_total_xp_required", {"levels": len(levels)},
+           measure(lambda _: [PROG.get_total_xp_required(lvl) for lvl in levels], repeat=n), {})
+    yield ("progression.level_for_xp", {"levels": len(levels)},
+           measure(lambda _: [PROG.level_for_xp(xp) for xp in xps], repeat=n), {})
+
+
+def bench_engine(quick):
+    for days in HISTORY_SIZES:
+        logs = make_logs(days)
+        repeat = 10 if quick else 50
+
+        def setup():
+            store = LogStore.from_list(logs)
+            store.columns()
+            return store, player_for(store)
+
+        def validate(ctx):
+            store, state = ctx
+            log = None
+            for task in state.tasks:
+                state, log, _ = engine.validate_task(state, PROG, task['id'], state.current_date, log)
+                store.add(log)
+
+        def skip(ctx):
+            store, state = ctx
+            state, log, _ = engine.skip_day(state, PROG, store.get(state.current_date))
+            store.add(log)
+
+        yield ("engine.validate_task", {"days": days, "tasks": TOTAL_TASKS}, measure(validate, setup, repeat), {})
+        yield ("engine.skip_day", {"days": days}, measure(skip, setup, repeat), {})
+
+
+def bench_persistence(quick):
+    for backend_name, make_backend in BACKENDS.items():
+        yield from _bench_persistence(quick, backend_name, make_backend)
+
+
+def _bench_persistence(quick, backend_name, make_backend):
+    for days in HISTORY_SIZES:
+        logs = make_logs(days)
+        repeat = 5 if quick else 20
+
+        def setup():
+            store = LogStore.from_list(logs).compact(engine.next_date(logs[-1]['date']))
+            state = player_for(store)
+            saver = DeltaSaver(make_backend(), "u1")
+            return saver, store, state
+
+        def full(ctx):
+            saver, store, state = ctx
+            saver.save(data_fields(state, store), store)
+
+        def setup_delta():
+            saver, store, state = setup()
+            saver.save(data_fields(state, store), store)
+            state, log, _ = engine.validate_task(state, PROG, 1, state.current_date)
+            store.add(log)
+            return saver, store, state
+
+        def delta(ctx):
+            saver, store, state = ctx
+            saver.save(data_fields(state, store), store)
+
+        saver, store, state = setup()
+        full_bytes = len(json.dumps(saver.capture(data_fields(state, store), store).full))
+        saver, store, state = setup_delta()
+        write = saver.capture(data_fields(state, store), store)
+        delta_bytes = len(json.dumps({"fields": write.fields, "logs": list(write.logs.values())}))
+
+        params = {"days": days, "backend": backend_name}
+        yield ("persistence.save_full", params, measure(full, setup, repeat), {"payload_bytes": full_bytes})
+        yield ("persistence.save_delta", params, measure(delta, setup_delta, repeat),
+               {"payload_bytes": delta_bytes})
+
+
+def bench_chart(quick):
+    for days in HISTORY_SIZES:
+        store = LogStore.from_list(make_logs(days))
+        repeat = 2 if quick else 5
+
+        def render(_):
+            render_chart_png(build_chart_frame(store.columns().view(), TOTAL_TASKS))
+
+        yield ("chart.render_png", {"days": days}, measure(render, repeat=repeat), {})
+
+
+# --- Vérifications : aller-retour DeltaSaver -> backend -> relecture ---
+
+def _persisted(backend, user_id):
+    data = backend.load(user_id)
+    return data['logs'], data.get('log_segments', [])
+
+
+def check_persistence(log=print):
+    """Rejoue delta, compaction, import et reset sur chaque backend ; renvoie les échecs"""
+    failures = []
+    for backend_name, make_backend in BACKENDS.items():
+        backend = make_backend()
+        saver = DeltaSaver(backend, "u1")
+        logs = make_logs(200)
+        store = LogStore.from_list(logs)
+        state = player_for(store)
+
+        def step(name, store, state, expected_kind):
+            kind = saver.save(data_fields(state, store), store)
+            expected = (store.to_list(), store.segments_payload())
+            ok = kind == expected_kind and _persisted(backend, "u1") == expected
+            log(f"check.{backend_name}.{name:<10} {kind or '-':<6} {'OK' if ok else 'ÉCHEC'}")
+            if not ok:
+                failures.append(f"{backend_name}.{name}")
+
+        step("initial", store, state, "full")
+        state, entry, _ = engine.validate_task(state, PROG, 1, state.current_date)
+        store.add(entry)
+        step("delta", store, state, "delta")
+        store = store.compact(engine.next_date(state.current_date))
+        step("compact", store, state, "full")
+        store = LogStore.from_list(make_logs(30, seed=1))
+        step("import", store, state, "full")
+        store = LogStore()
+        step("reset", store, state, "full")
+
+        # Delta avec journal remplacé (p_fields->'logs') : p_logs se fusionne sur le nouveau journal
+        replaced, added = make_logs(5, seed=2), make_logs(6, seed=3)[5:]
+        backend.apply("u1", {"logs": replaced}, added)
+        ok = _persisted(backend, "u1")[0] == replaced + added
+        log(f"check.{backend_name}.{'apply':<10} {'delta':<6} {'OK' if ok else 'ÉCHEC'}")
+        if not ok:
+            failures.append(f"{backend_name}.apply")
+    return failures
+
+
+SUITES = {
+    "progression": bench_progression,
+    "engine": bench_engine,
+    "persistence": bench_persistence,
+    "chart": bench_chart,
+}
+
+
+def result_key(result):
+    return result["name"] + "".join(f"[{k}={v}]" for k, v in sorted(result["params"].items()))
+
+
+def run(suites, quick=False, log=print):
+    results = []
+    for suite in suites:
+        for name, params, times, extra in SUITES[suite](quick):
+            result = {
+                "name": name,
+                "params": params,
+                "repeat": len(times),
+                "min_ms": round(min(times) * 1000, 4),
+                "median_ms": round(statistics.median(times) * 1000, 4),
+                "mean_ms": round(statistics.fmean(times) * 1000, 4),
+                **extra,
+            }
+            results.append(result)
+            log(f"{result_key(result):<55} {result['median_ms']:>10.3f} ms"
+                + (f"  {extra['payload_bytes']:>9} o" if 'payload_bytes' in extra else ""))
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def compare(base, results, threshold, log=print):
+    """Compare les médianes à un fichier de référence ; renvoie les clés en régression"""
+    base_by_key = {result_key(r): r for r in base["results"]}
+    regressions = []
+    for result in results:
+        key = result_key(result)
+        ref = base_by_key.get(key)
+        if ref is None or not ref["median_ms"]:
+            continue
+        ratio = result["median_ms"] / ref["median_ms"]
+        flag = ""
+        if ratio > threshold:
+            regressions.append(key)
+            flag = "  RÉGRESSION"
+        log(f"{key:<55} {ref['median_ms']:>10.3f} -> {result['median_ms']:>10.3f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=list(SUITES), default=list(SUITES))
+    parser.add_argument("--quick", action="store_true", help="moins de répétitions")
+    parser.add_argument("--json", help="fichier de résultats à écrire")
+    parser.add_argument("--compare", help="résultats de référence (JSON) à comparer")
+    parser.add_argument("--threshold", type=float, default=1.25, help="ratio de médiane jugé en régression")
+    parser.add_argument("--check", action="store_true", help="vérifie la persistance avant de mesurer")
+    args = parser.parse_args(argv)
+
+    if args.check and check_persistence():
+        sys.exit(1)
+    results = run(args.only, quick=args.quick)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
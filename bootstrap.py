@@ -0,0 +1,60 @@
+"""Chargement concurrent d'une session après connexion.
+
+Les lectures indépendantes (ligne joueur, réserves de citations...) partent
+ensemble sur un pool de threads partagé par le processus. L'app n'attend que
+ce dont le premier affichage a besoin, avec un délai maximal par appel ; les
+autres lectures se terminent en arrière-plan.
+
+Chaque appel est chronométré : `report()` compare l'attente réelle du premier
+affichage à la somme des latences, soit ce qu'aurait coûté un chargement
+séquentiel.
+"""
+import time
+
+
+class Bootstrap:
+    def __init__(self, executor):
+        self.executor = executor
+        self.durations = {}       # nom -> durée (s) des appels terminés
+        self.errors = {}          # nom -> nom de l'exception
+        self.waited = 0.0         # temps passé à attendre dans le thread du script
+        self._futures = {}
+
+    def submit(self, name, fn):
+        """Lance `fn()` sur le pool sous le nom `name` -> Future"""
+        future = self._futures[name] = self.executor.submit(self._timed, name, fn)
+        return future
+
+    def _timed(self, name, fn):
+        t0 = time.perf_counter()
+        try:
+            return fn()
+        except Exception as e:
+            self.errors[name] = type(e).__name__
+            raise
+        finally:
+            self.durations[name] = time.perf_counter() - t0
+
+    def result(self, name, timeout):
+        """Résultat de l'appel `name` ; TimeoutError si pas de réponse sous `timeout` s
+        (l'appel continue : un nouvel essai attend la même requête)"""
+        t0 = time.perf_counter()
+        try:
+            return self._futures[name].result(timeout)
+        finally:
+            self.waited += time.perf_counter() - t0
+
+    def done(self):
+        return all(f.done() for f in self._futures.values())
+
+    def report(self):
+        """Latences par appel et temps gagné sur un chargement séquentiel (ms)"""
+        sequential = sum(self.durations.values())
+        return {
+            "calls_ms": {name: round(s * 1000, 2) for name, s in self.durations.items()},
+            "pending": [name for name, f in self._futures.items() if not f.done()],
+            "errors": dict(self.errors),
+            "waited_ms": round(self.waited * 1000, 2),
+            "sequential_ms": round(sequential * 1000, 2),
+            "saved_ms": round(max(sequential - self.waited, 0.0) * 1000, 2),
+        }
@@ -0,0 +1,144 @@
+"""Graphique de progression (onglet 📈).
+
+Les statuts de chaque jour sont calculés de façon vectorisée et chaque
+catégorie (vert / orange / rouge / lvl up) est tracée en un seul appel
+`scatter`, quel que soit le nombre de jours.
+
+Le rendu PNG est mis en cache (ChartCache) sous une empreinte bon marché de
+l'état du journal et des filtres : une interaction qui ne touche pas au
+graphique ne repasse pas par matplotlib.
+
+pandas, numpy et matplotlib ne sont importés qu'au premier rendu réel.
+"""
+import io
+import threading
+from collections import OrderedDict
+
+from startup import lazy_import
+
+STATUS_COLORS = ("green", "orange", "red")
+# Mêmes options que st.pyplot
+SAVEFIG_OPTIONS = {"bbox_inches": "tight", "dpi": 200, "format": "png"}
+
+
+def build_chart_frame(columns, total_tasks):
+    """DataFrame trié par date avec les colonnes date_dt, xp_snapshot, level_up et color.
+
+    `columns` vient de LogColumns.view() : (dates, nb de tâches validées,
+    xp_snapshot, lvl up) ; les trois premières colonnes du DataFrame sont des
+    vues sur ces tableaux, sans copie.
+    """
+    pd = lazy_import("pandas")
+    np = lazy_import("numpy")
+    dates, counts, xps, level_ups = columns
+    df_logs = pd.DataFrame({
+        'date_dt': dates,
+        'xp_snapshot': xps,
+        'level_up': level_ups,
+    }, copy=False)
+    if df_logs.empty:
+        return df_logs
+
+    total_tasks = max(total_tasks, 1)
+    df_logs['color'] = np.select(
+        [counts == 0, counts >= total_tasks],
+        ['red', 'green'],
+        default='orange'
+    )
+    return df_logs
+
+
+def render_progression_chart(df_logs, show_curve=True, show_100=True, show_mid=True, show_0=True, show_lvlup=True):
+    """Construit la figure matplotlib (style xkcd) ; à fermer par l'appelant"""
+    plt = lazy_import("matplotlib.pyplot")
+    dates = df_logs['date_dt'].to_numpy()
+    xp = df_logs['xp_snapshot'].to_numpy(dtype=float)
+    colors = df_logs['color'].to_numpy()
+    shown = {"green": show_100, "orange": show_mid, "red": show_0}
+
+    with plt.xkcd():
+        fig, ax = plt.subplots(figsize=(10, 6))
+
+        if show_curve:
+            ax.plot(dates, xp, color='blue', alpha=0.5, linewidth=2)
+
+        if show_lvlup:
+            mask = df_logs['level_up'].to_numpy()
+            if mask.any():
+                ax.scatter(dates[mask], xp[mask], color='black', s=200, marker='*', zorder=10)
+
+        for color in STATUS_COLORS:
+            if not shown[color]:
+                continue
+            mask = colors == color
+            if mask.any():
+                ax.scatter(dates[mask], xp[mask], color=color, s=100, zorder=5)
+
+        ax.set_ylabel("XP Totale")
+        ax.set_xlabel("Date")
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+        fig.autofmt_xdate()
+        fig.patch.set_alpha(0)
+        ax.patch.set_alpha(0)
+
+    return fig
+
+
+def render_chart_png(df_logs, *filters):
+    """Rendu PNG du graphique ; la figure est fermée aussitôt"""
+    plt = lazy_import("matplotlib.pyplot")
+    fig = render_progression_chart(df_logs, *filters)
+    try:
+        buf = io.BytesIO()
+        fig.savefig(buf, **SAVEFIG_OPTIONS)
+        return buf.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def chart_fingerprint(logs, total_tasks, period_start, filters):
+    """Empreinte de tout ce qui influe sur le graphique, sans parcourir le journal.
+
+    `logs` est le LogStore de la session : sa version change à chaque entrée
+    ajoutée ou modifiée, et un store remplacé (import, reset, compaction) en
+    a une nouvelle.
+    """
+    return (logs.version, total_tasks, period_start, tuple(filters))
+
+
+class ChartCache:
+    """Cache LRU des PNG rendus, par utilisateur, borné en nombre et en octets"""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, max_entries=256):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # (user_id, empreinte) -> PNG
+        self._lock = threading.Lock()
+
+    def get_or_render(self, user_id, fingerprint, render):
+        key = (user_id, fingerprint)
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return png
+            self.misses += 1
+
+        png = render()
+        with self._lock:
+            if key not in self._entries and len(png) <= self.max_bytes:
+                self._entries[key] = png
+                self.total_bytes += len(png)
+                self._evict()
+        return png
+
+    def _evict(self):
+        while self._entries and (self.total_bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            _, png = self._entries.popitem(last=False)
+            self.total_bytes -= len(png)
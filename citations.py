@@ -0,0 +1,97 @@
+"""Cache des citations, partagé par tout le processus.
+
+Une réserve (pool) par type de citation, rechargée en arrière-plan quand elle
+dépasse son TTL. Si la base est injoignable, on continue de servir le dernier
+instantané valide : en régime établi, afficher une citation ne coûte aucun
+appel réseau. `prefetch()` charge les réserves manquantes en arrière-plan dès la
+connexion ; une demande qui arrive pendant ce chargement l'attend (au plus
+`wait_timeout` s) au lieu de relancer la requête. Après un échec de premier
+chargement, le chargement synchrone n'est retenté qu'au bout de `retry_after` s.
+"""
+import random
+import threading
+import time
+
+
+class CitationCache:
+    def __init__(self, fetch, ttl=600.0, wait_timeout=3.0, retry_after=30.0):
+        self.fetch = fetch          # fetch(quote_type) -> liste de {"text", "author"}
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.retry_after = retry_after
+        self._pools = {}            # type -> (tuple de citations, instant du chargement)
+        self._failed_at = {}        # type -> instant du dernier échec de chargement
+        self._refreshing = set()
+        self._inflight = {}         # type -> Future d'un prefetch en cours
+        self._lock = threading.Lock()
+
+    def get_random(self, quote_type):
+        """Citation aléatoire du type demandé, ou None si aucune n'est disponible"""
+        entry = self._pools.get(quote_type)
+        if entry is None:
+            future = self._inflight.get(quote_type)
+            if future is not None:
+                # Prefetch en cours : on l'attend plutôt que de doubler la requête
+                try:
+                    future.result(self.wait_timeout)
+                except TimeoutError:
+                    return None
+            elif time.monotonic() - self._failed_at.get(quote_type, float("-inf")) >= self.retry_after:
+                # Premier accès à ce type : chargement synchrone (espacé si la base est injoignable)
+                self.refresh(quote_type)
+            entry = self._pools.get(quote_type)
+        elif time.monotonic() - entry[1] > self.ttl:
+            self._refresh_in_background(quote_type)
+
+        if not entry or not entry[0]:
+            return None
+        return random.choice(entry[0])
+
+    def refresh(self, quote_type):
+        """Recharge la réserve ; True si la base a répondu (même sans citation).
+        En cas d'échec, l'ancien instantané est conservé"""
+        try:
+            rows = self.fetch(quote_type)
+        except Exception as e:
+            print(f"❌ Erreur fetch citation: {e}")
+            self._failed_at[quote_type] = time.monotonic()
+            return False
+        self._failed_at.pop(quote_type, None)
+        if not rows:
+            print(f"⚠️ Aucune citation trouvée dans la DB pour le type: '{quote_type}'. Vérifier RLS.")
+            previous = self._pools.get(quote_type)
+            if previous is not None and previous[0]:
+                # On ne remplace pas un instantané valide par une réserve vide
+                self._pools[quote_type] = (previous[0], time.monotonic())
+                return True
+        self._pools[quote_type] = (tuple(rows or ()), time.monotonic())
+        return True
+
+    def warm(self, quote_types):
+        for quote_type in quote_types:
+            self.refresh(quote_type)
+
+    def prefetch(self, quote_type, submit):
+        """Lance le chargement d'une réserve absente via `submit(fn)` -> Future ;
+        renvoie la Future, ou None si la réserve est déjà là ou en cours de chargement"""
+        with self._lock:
+            if quote_type in self._pools or quote_type in self._inflight:
+                return None
+            future = self._inflight[quote_type] = submit(lambda: self.refresh(quote_type))
+        future.add_done_callback(lambda _: self._inflight.pop(quote_type, None))
+        return future
+
+    def _refresh_in_background(self, quote_type):
+        with self._lock:
+            if quote_type in self._refreshing:
+                return
+            self._refreshing.add(quote_type)
+
+        def run():
+            try:
+                self.refresh(quote_type)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(quote_type)
+
+        threading.Thread(target=run, name=f"citations-{quote_type}", daemon=True).start()
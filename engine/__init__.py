@@ -0,0 +1,11 @@
+"""Moteur de jeu indépendant de Streamlit (utilisable en batch, en simulation, en test)."""
+from engine.rules import (
+    add_task, apply_exalte_penalty, catch_up_to, check_levelup, delete_task, edit_task, max_slots,
+    missed_tasks, next_date, replay_history, skip_day, validate_task,
+)
+from engine.state import Event, PlayerState, new_log
+
+__all__ = [
+    "Event", "PlayerState", "add_task", "apply_exalte_penalty", "catch_up_to", "check_levelup", "delete_task",
+    "edit_task", "max_slots", "missed_tasks", "new_log", "next_date", "replay_history", "skip_day", "validate_task",
+]
@@ -0,0 +1,175 @@
+"""Règles du jeu, sous forme de transitions pures.
+
+Chaque transition reçoit un PlayerState, l'objet Progression compilé
+(progression.py) et, pour les règles journalières, l'entrée de journal du jour
+concerné (ou None). Elle renvoie un nouvel état, la nouvelle entrée de journal
+et la liste des événements produits ; rien n'est modifié sur place.
+"""
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+from engine.state import Event, new_log
+
+
+def next_date(date):
+    curr = datetime.strptime(date, "%Y-%m-%d")
+    return (curr + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def max_slots(state, prog):
+    return prog.max_slots(state.user_lvl)
+
+
+def add_task(state, prog, name):
+    """-> (state, events) ; événement "slots_full" si le joueur n'a plus de slot"""
+    if len(state.tasks) >= max_slots(state, prog):
+        return state, [Event("slots_full")]
+    new_id = max((t['id'] for t in state.tasks), default=0) + 1
+    return replace(state, tasks=state.tasks + ({"id": new_id, "name": name},)), []
+
+
+def edit_task(state, task_id, new_name):
+    tasks = tuple({**t, "name": new_name} if t['id'] == task_id else t for t in state.tasks)
+    return replace(state, tasks=tasks), []
+
+
+def delete_task(state, task_id):
+    return replace(state, tasks=tuple(t for t in state.tasks if t['id'] != task_id)), []
+
+
+def check_levelup(state, prog, log):
+    """Monte le niveau jusqu'au palier atteint par l'XP -> (state, log, events)"""
+    new_lvl = max(state.user_lvl, prog.level_for_xp(state.user_xp))
+    if new_lvl <= state.user_lvl:
+        return state, log, []
+    events = [
+        Event("level_up", {"from": state.user_lvl, "to": new_lvl}),
+        Event("quote_needed", {"quote_type": "reussite"}),
+    ]
+    if log is not None:
+        log = {**log, "level_up": True}
+    return replace(state, user_lvl=new_lvl), log, events
+
+
+def validate_task(state, prog, task_id, date, log=None):
+    """Valide une tâche pour le jour `date` -> (state, log, events)"""
+    log = dict(log) if log is not None else new_log(date, state.user_xp)
+    if task_id in log['tasks_completed']:
+        return state, log, []
+
+    state = replace(state, user_xp=state.user_xp + prog.task_xp)
+    log['tasks_completed'] = log['tasks_completed'] + [task_id]
+    log['xp_snapshot'] = state.user_xp
+    state, log, events = check_levelup(state, prog, log)
+    return state, log, [Event("task_validated", {"task_id": task_id})] + events
+
+
+def missed_tasks(state, log):
+    total_tasks = len(state.tasks)
+    completed = len(log['tasks_completed'])
+    if total_tasks > 0 and completed < total_tasks:
+        return total_tasks - completed
+    return 0
+
+
+def apply_exalte_penalty(state, prog, log):
+    """Retire l'XP des tâches manquées en mode pénalité -> (state, events)"""
+    if state.game_mode != prog.penalty_mode:
+        return state, []
+    missed = missed_tasks(state, log)
+    if not missed:
+        return state, []
+
+    user_xp = max(state.user_xp - missed * prog.task_xp, 0)
+    user_lvl = min(state.user_lvl, prog.level_for_xp(user_xp))
+    event = Event("penalty", {
+        "xp_lost": state.user_xp - user_xp,
+        "levels_lost": state.user_lvl - user_lvl
+    })
+    return replace(state, user_xp=user_xp, user_lvl=user_lvl), [event]
+
+
+def skip_day(state, prog, log=None):
+    """Clôture `state.current_date` et passe au lendemain -> (state, log clôturé, events)"""
+    log = dict(log) if log is not None else new_log(state.current_date, state.user_xp)
+    state, events = apply_exalte_penalty(state, prog, log)
+    log['xp_snapshot'] = state.user_xp
+
+    if missed_tasks(state, log):
+        events.append(Event("quote_needed", {"quote_type": "echec"}))
+
+    return replace(state, current_date=next_date(state.current_date)), log, events
+
+
+def catch_up_to(state, prog, today, log=None):
+    """Clôture d'un coup tous les jours de `state.current_date` à la veille de `today`.
+
+    `log` est l'entrée du jour courant (le seul jour qui peut en avoir une : les
+    jours suivants n'ont par construction aucune tâche validée). La pénalité de
+    ces jours vides est calculée en forme close et le niveau résolu par une
+    seule recherche. -> (state, entrées de journal créées, events)
+    """
+    if state.current_date >= today:
+        return state, [], []
+    start_xp, start_lvl = state.user_xp, state.user_lvl
+
+    state, first_log, first_events = skip_day(state, prog, log)
+    start = datetime.strptime(state.current_date, "%Y-%m-%d")
+    n_empty = (datetime.strptime(today, "%Y-%m-%d") - start).days
+    logs = [first_log]
+
+    if n_empty > 0:
+        daily_penalty = 0
+        if state.game_mode == prog.penalty_mode:
+            daily_penalty = len(state.tasks) * prog.task_xp
+        xp = state.user_xp
+        logs.extend(
+            new_log((start + timedelta(days=i)).strftime("%Y-%m-%d"), max(xp - (i + 1) * daily_penalty, 0))
+            for i in range(n_empty)
+        )
+        final_xp = max(xp - n_empty * daily_penalty, 0)
+        state = replace(
+            state,
+            user_xp=final_xp,
+            user_lvl=min(state.user_lvl, prog.level_for_xp(final_xp)),
+            current_date=today
+        )
+
+    events = [Event("days_skipped", {"count": len(logs)})]
+    if state.user_xp < start_xp:
+        events.append(Event("penalty", {
+            "xp_lost": start_xp - state.user_xp,
+            "levels_lost": start_lvl - state.user_lvl
+        }))
+    if any(e.kind == "quote_needed" for e in first_events) or (n_empty > 0 and state.tasks):
+        # Une seule citation pour toute l'absence
+        events.append(Event("quote_needed", {"quote_type": "echec"}))
+    return state, logs, events
+
+
+def replay_history(state, prog, logs):
+    """Rejoue un historique importé depuis zéro XP -> (state, entrées recalculées).
+
+    `logs` est trié par date, sans doublon, jusqu'à `state.current_date`.
+    Chaque jour applique les gains de ses tâches validées (validate_task), les
+    montées de niveau (check_levelup) puis, s'il est clos, la pénalité de fin
+    de journée (skip_day) calculée avec les tâches actuelles du joueur : le
+    journal ne garde pas combien de tâches étaient actives ce jour-là.
+    xp_snapshot et level_up des entrées sont recalculés.
+    """
+    xp, lvl = 0, 1
+    penalize = state.game_mode == prog.penalty_mode
+    total_tasks = len(state.tasks)
+    replayed = []
+    for log in logs:
+        done = len(log['tasks_completed']) if 'tasks_completed' in log else log.get('completed_count', 0)
+        xp += done * prog.task_xp
+        new_lvl = max(lvl, prog.level_for_xp(xp))
+        log = {**log, "level_up": new_lvl > lvl}
+        lvl = new_lvl
+        if penalize and log['date'] < state.current_date and 0 < total_tasks and done < total_tasks:
+            xp = max(xp - (total_tasks - done) * prog.task_xp, 0)
+            lvl = min(lvl, prog.level_for_xp(xp))
+        log['xp_snapshot'] = xp
+        replayed.append(log)
+    return replace(state, user_xp=xp, user_lvl=lvl), replayed
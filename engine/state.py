@@ -0,0 +1,29 @@
+"""État d'un joueur et événements produits par les règles du jeu."""
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerState:
+    """Partie scalaire de l'état d'un joueur (le journal est géré à part, jour par jour)"""
+    tasks: tuple = ()              # dicts {"id", "name"}, jamais modifiés sur place
+    user_xp: float = 0
+    user_lvl: int = 1
+    game_mode: str = "Séide"
+    current_date: str = ""         # "YYYY-MM-DD"
+
+
+@dataclass(frozen=True, slots=True)
+class Event:
+    """Effet de bord à traiter par l'appelant (UI, batch...)"""
+    kind: str   # "task_validated", "level_up", "penalty", "quote_needed", "slots_full", "days_skipped"
+    data: dict = field(default_factory=dict)
+
+
+def new_log(date, xp_snapshot):
+    """Entrée de journal vide, au format JSONB `logs`"""
+    return {
+        "date": date,
+        "tasks_completed": [],
+        "level_up": False,
+        "xp_snapshot": xp_snapshot
+    }
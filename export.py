@@ -0,0 +1,92 @@
+"""Export des données joueur, généré à la demande et par morceaux.
+
+Chaque format est un générateur de morceaux de texte, sans copie
+intermédiaire de l'historique. `export_bytes()` les assemble en un seul
+`bytes` : st.download_button lit de toute façon le fichier entier en mémoire
+(et exige un flux repositionnable), on le lui donne via un callable appelé
+seulement au clic.
+
+- JSON   : document complet (tâches, XP, profil, journal)
+- NDJSON : une entrée de journal par ligne
+- CSV    : une ligne par jour (ids des tâches séparés par « ; »)
+"""
+import csv
+import io
+import json
+
+from log_segments import completed_count
+
+CHUNK_ROWS = 500   # entrées de journal par morceau
+CSV_COLUMNS = ("date", "completed_count", "tasks_completed", "level_up", "xp_snapshot")
+
+
+def iter_json(fields, logs):
+    """Document JSON : `fields` (dict) puis la clé "logs", écrite entrée par entrée"""
+    yield "{\n"
+    for key, value in fields.items():
+        yield f"  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},\n"
+    yield '  "logs": ['
+    chunk = []
+    first = True
+    for log in logs:
+        chunk.append(("\n    " if first else ",\n    ") + json.dumps(log, ensure_ascii=False))
+        first = False
+        if len(chunk) >= CHUNK_ROWS:
+            yield "".join(chunk)
+            chunk = []
+    chunk.append("\n  ]\n}\n" if not first else "]\n}\n")
+    yield "".join(chunk)
+
+
+def iter_ndjson(logs):
+    chunk = []
+    for log in logs:
+        chunk.append(json.dumps(log, ensure_ascii=False) + "\n")
+        if len(chunk) >= CHUNK_ROWS:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def iter_csv(logs):
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(CSV_COLUMNS)
+    for i, log in enumerate(logs, 1):
+        tasks = log.get('tasks_completed')
+        writer.writerow((
+            log['date'],
+            completed_count(log),
+            ";".join(str(t) for t in tasks) if tasks is not None else "",
+            int(bool(log['level_up'])),
+            log['xp_snapshot']
+        ))
+        if i % CHUNK_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+# format -> (extension, type MIME)
+EXPORT_FORMATS = {
+    "JSON": ("json", "application/json"),
+    "NDJSON": ("ndjson", "application/x-ndjson"),
+    "CSV": ("csv", "text/csv"),
+}
+
+
+def iter_export(fmt, fields, logs):
+    if fmt == "JSON":
+        return iter_json(fields, logs)
+    if fmt == "NDJSON":
+        return iter_ndjson(logs)
+    if fmt == "CSV":
+        return iter_csv(logs)
+    raise ValueError(f"Format d'export inconnu : {fmt}")
+
+
+def export_bytes(fmt, fields, logs, encoding="utf-8"):
+    """Contenu de l'export ; `logs` est un itérable (LogStore.history())"""
+    return "".join(iter_export(fmt, fields, logs)).encode(encoding)
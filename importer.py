@@ -0,0 +1,188 @@
+"""Import d'un historique (restauration d'export, migration de compte).
+
+Accepte les trois formats de export.py. Les entrées sont lues au fil du
+fichier (NDJSON, CSV) ou du document déjà décodé (JSON), validées et
+dédoublonnées par date dans un seul dict ; xp_snapshot, level_up, l'XP et le
+niveau sont ensuite recalculés par engine.replay_history.
+
+Une entrée invalide est écartée et signalée ; l'import ne s'applique pas si
+aucune entrée n'est valide.
+"""
+import csv
+import io
+import json
+from dataclasses import replace
+from datetime import date
+
+import engine
+
+MAX_REPORTED_ERRORS = 20
+
+
+class ImportReport:
+    __slots__ = ("read", "imported", "duplicates", "errors", "error_count")
+
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.errors = []        # (ligne ou indice, message), tronqué à MAX_REPORTED_ERRORS
+        self.error_count = 0
+
+    def add_error(self, where, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((where, message))
+
+
+def format_from_name(file_name):
+    """Format d'import d'après l'extension du fichier (défaut : JSON)"""
+    extension = file_name.rsplit(".", 1)[-1].lower()
+    return {"ndjson": "NDJSON", "jsonl": "NDJSON", "csv": "CSV"}.get(extension, "JSON")
+
+
+def _text(stream):
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+
+def iter_records(fmt, stream, fields):
+    """(position, entrée brute) depuis un flux binaire ; les champs de premier
+    niveau d'un document JSON (tasks, profile...) sont copiés dans `fields`"""
+    if fmt == "NDJSON":
+        for line_no, line in enumerate(_text(stream), 1):
+            if line.strip():
+                try:
+                    yield line_no, json.loads(line)
+                except ValueError:
+                    yield line_no, None
+    elif fmt == "CSV":
+        reader = csv.DictReader(_text(stream))
+        try:
+            for row in reader:
+                yield reader.line_num, row
+        except csv.Error as e:
+            raise ValueError(f"CSV invalide ligne {reader.line_num} : {e}") from None
+    elif fmt == "JSON":
+        document = json.load(_text(stream))
+        if isinstance(document, list):
+            document = {"logs": document}
+        if not isinstance(document, dict):
+            raise ValueError("le document doit être un objet ou une liste d'entrées")
+        logs = document.pop('logs', [])
+        if not isinstance(logs, list):
+            raise ValueError("la clé « logs » doit être une liste d'entrées")
+        fields.update(document)
+        for i in range(len(logs)):
+            # Chaque entrée n'est référencée qu'une fois : le document décodé se vide au fil de l'import
+            yield i, logs[i]
+            logs[i] = None
+    else:
+        raise ValueError(f"Format d'import inconnu : {fmt}")
+
+
+def _int(value, name):
+    if isinstance(value, bool):
+        raise ValueError(f"{name} invalide : {value!r}")
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} invalide : {value!r}") from None
+    if number < 0 or number != value and not isinstance(value, str):
+        raise ValueError(f"{name} invalide : {value!r}")
+    return number
+
+
+def normalize_entry(raw):
+    """Entrée de journal validée (xp_snapshot et level_up à recalculer) ; ValueError sinon"""
+    if not isinstance(raw, dict):
+        raise ValueError("entrée illisible")
+    day = raw.get('date')
+    try:
+        valid = isinstance(day, str) and date.fromisoformat(day).isoformat() == day
+    except ValueError:
+        valid = False
+    if not valid:
+        raise ValueError(f"date invalide : {day!r}")
+
+    tasks = raw.get('tasks_completed')
+    if isinstance(tasks, str):
+        # CSV : ids séparés par « ; », colonne vide pour un jour compacté
+        tasks = [t for t in tasks.split(";") if t.strip()] or None
+    if tasks is not None:
+        if not isinstance(tasks, list):
+            raise ValueError(f"tasks_completed invalide : {tasks!r}")
+        ids = list(dict.fromkeys(_int(t, "id de tâche") for t in tasks))
+        return {"date": day, "tasks_completed": ids, "level_up": False, "xp_snapshot": 0}
+
+    count = _int(raw.get('completed_count', 0), "completed_count")
+    if count == 0:
+        return {"date": day, "tasks_completed": [], "level_up": False, "xp_snapshot": 0}
+    return {"date": day, "completed_count": count, "level_up": False, "xp_snapshot": 0}
+
+
+def _normalize_tasks(tasks):
+    if not isinstance(tasks, list):
+        raise ValueError("liste de tâches invalide")
+    normalized = []
+    for task in tasks:
+        if not isinstance(task, dict) or not isinstance(task.get('name'), str):
+            raise ValueError(f"tâche invalide : {task!r}")
+        normalized.append({"id": _int(task.get('id'), "id de tâche"), "name": task['name']})
+    return normalized
+
+
+def read_import(fmt, stream, current_date):
+    """Lit et valide un fichier -> (champs, entrées triées par date, ImportReport).
+
+    Une seule entrée par date (la première rencontrée, comme LogStore.from_list) ;
+    les dates postérieures au jour courant sont refusées. `champs` ne contient
+    que les tâches et le profil reconnus d'un document JSON.
+    """
+    report = ImportReport()
+    raw_fields = {}
+    by_date = {}
+    for where, raw in iter_records(fmt, stream, raw_fields):
+        report.read += 1
+        try:
+            log = normalize_entry(raw)
+        except ValueError as e:
+            report.add_error(where, str(e))
+            continue
+        if log['date'] > current_date:
+            report.add_error(where, f"date future : {log['date']}")
+        elif 'completed_count' in log and log['date'] == current_date:
+            report.add_error(where, "le jour courant doit lister ses tâches validées")
+        elif log['date'] in by_date:
+            report.duplicates += 1
+        else:
+            by_date[log['date']] = log
+
+    fields = {}
+    if 'tasks' in raw_fields:
+        try:
+            fields['tasks'] = _normalize_tasks(raw_fields['tasks'])
+        except ValueError as e:
+            report.add_error("tasks", str(e))
+    if isinstance(raw_fields.get('profile'), dict):
+        fields['profile'] = {k: raw_fields['profile'].get(k) for k in ("gender", "birth_year")}
+
+    logs = [by_date[d] for d in sorted(by_date)]
+    report.imported = len(logs)
+    return fields, logs, report
+
+
+def _consume(logs):
+    for i in range(len(logs)):
+        yield logs[i]
+        logs[i] = None
+
+
+def replay_import(state, prog, fields, logs):
+    """Applique les tâches importées puis rejoue l'historique -> (state, entrées recalculées).
+
+    `logs` (sortie de read_import) est vidé au fur et à mesure : les entrées
+    lues ne coexistent pas avec les entrées recalculées.
+    """
+    if 'tasks' in fields:
+        state = replace(state, tasks=tuple(fields['tasks']))
+    return engine.replay_history(state, prog, _consume(logs))
@@ -0,0 +1,103 @@
+"""Vue colonnes NumPy du journal, pour le graphique et les analyses.
+
+Quatre tableaux à capacité doublée : dates (datetime64[s], l'unité que
+pandas accepte sans conversion), nombre de tâches validées (int32),
+xp_snapshot (float64) et lvl up (bool). L'ajout du jour le plus récent est
+un O(1) amorti ; le graphique lit des vues sur ces tableaux, sans copie.
+
+Tenue à jour par LogStore (voir log_store.py) ; numpy n'est importé qu'à la
+première construction.
+"""
+from startup import lazy_import
+
+_SECONDS_PER_DAY = 86400
+# date.toordinal() du 1970-01-01, origine de datetime64
+_EPOCH_ORDINAL = 719163
+_MIN_CAPACITY = 64
+
+
+class LogColumns:
+    __slots__ = ("_dates", "_counts", "_xps", "_level_ups", "_size")
+
+    def __init__(self, capacity=_MIN_CAPACITY):
+        np = lazy_import("numpy")
+        capacity = max(capacity, _MIN_CAPACITY)
+        self._dates = np.empty(capacity, dtype="datetime64[s]")
+        self._counts = np.empty(capacity, dtype=np.int32)
+        self._xps = np.empty(capacity, dtype=np.float64)
+        self._level_ups = np.empty(capacity, dtype=bool)
+        self._size = 0
+
+    @classmethod
+    def from_chart_columns(cls, ordinals, counts, xps, level_ups):
+        """Colonnes depuis LogStore.chart_columns() (tableaux `array`, triés par date)"""
+        np = lazy_import("numpy")
+        n = len(ordinals)
+        columns = cls(n + n // 2)
+        seconds = (np.asarray(ordinals, dtype=np.int64) - _EPOCH_ORDINAL) * _SECONDS_PER_DAY
+        columns._dates[:n] = seconds.astype("datetime64[s]")
+        columns._counts[:n] = counts
+        columns._xps[:n] = xps
+        columns._level_ups[:n] = level_ups
+        columns._size = n
+        return columns
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def dates(self):
+        return self._dates[:self._size]
+
+    @property
+    def counts(self):
+        return self._counts[:self._size]
+
+    @property
+    def xp_snapshots(self):
+        return self._xps[:self._size]
+
+    @property
+    def level_ups(self):
+        return self._level_ups[:self._size]
+
+    def append(self, ordinal, count, xp, level_up):
+        """Ajoute un jour postérieur à tous les autres"""
+        if self._size == len(self._dates):
+            self._grow()
+        self.set(self._size, ordinal, count, xp, level_up)
+        self._size += 1
+
+    def set(self, index, ordinal, count, xp, level_up):
+        self._dates[index] = (ordinal - _EPOCH_ORDINAL) * _SECONDS_PER_DAY
+        self._counts[index] = count
+        self._xps[index] = xp
+        self._level_ups[index] = level_up
+
+    def since(self, start=None):
+        """Indice du premier jour >= `start` ("YYYY-MM-DD", optionnel)"""
+        if not start:
+            return 0
+        np = lazy_import("numpy")
+        return int(np.searchsorted(self.dates, np.datetime64(start, "s")))
+
+    def view(self, start=None):
+        """(dates, counts, xp_snapshots, level_ups) depuis `start`, en vues sans copie.
+
+        Les vues partagent la mémoire des colonnes : elles ne restent valides
+        que jusqu'à la prochaine modification du journal.
+        """
+        lo = self.since(start)
+        return self.dates[lo:], self.counts[lo:], self.xp_snapshots[lo:], self.level_ups[lo:]
+
+    def nbytes(self):
+        return sum(a.nbytes for a in (self._dates, self._counts, self._xps, self._level_ups))
+
+    def _grow(self):
+        np = lazy_import("numpy")
+        capacity = 2 * len(self._dates)
+        for name in ("_dates", "_counts", "_xps", "_level_ups"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
@@ -0,0 +1,158 @@
+"""Segments compacts de l'historique ancien.
+
+Au-delà de la fenêtre récente, les entrées de journal sont regroupées en
+segments colonnes : décalage en jours depuis le début du segment, nombre de
+tâches validées, delta d'xp_snapshot et bit de lvl up, chacun dans un
+`array`. Le détail des tâches validées (leurs ids) n'est plus conservé, seul
+leur nombre l'est.
+
+Un segment se sérialise en base64(zlib(colonnes)) dans la clé JSONB
+`log_segments`.
+"""
+import base64
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+# nombre de jours, typecode des deltas d'XP ('q' entiers, 'd' flottants)
+_HEADER = struct.Struct("<Ic")
+
+
+def date_to_ordinal(value):
+    return date.fromisoformat(value).toordinal()
+
+
+def ordinal_to_date(ordinal):
+    return date.fromordinal(ordinal).isoformat()
+
+
+class LogSegment:
+    __slots__ = ("start", "offsets", "counts", "xp_deltas", "level_up", "_payload")
+
+    def __init__(self, start, offsets, counts, xp_deltas, level_up):
+        self.start = start            # ordinal du premier jour
+        self.offsets = offsets        # array('I') : jours depuis start, croissants
+        self.counts = counts          # array('B') : tâches validées
+        self.xp_deltas = xp_deltas    # array('q'|'d') : xp_snapshot - xp_snapshot précédent
+        self.level_up = level_up      # bytearray : 1 bit par jour
+        self._payload = None
+
+    @classmethod
+    def from_logs(cls, logs):
+        """Segment à partir d'entrées JSONB triées par date"""
+        ordinals = [date_to_ordinal(log['date']) for log in logs]
+        start = ordinals[0]
+        xps = [log['xp_snapshot'] for log in logs]
+        typecode = 'q' if all(float(x).is_integer() for x in xps) else 'd'
+        cast = int if typecode == 'q' else float
+
+        xp_deltas = array(typecode)
+        previous = 0
+        for xp in xps:
+            xp_deltas.append(cast(xp) - previous)
+            previous = cast(xp)
+
+        level_up = bytearray((len(logs) + 7) // 8)
+        for i, log in enumerate(logs):
+            if log.get('level_up'):
+                level_up[i >> 3] |= 1 << (i & 7)
+
+        return cls(
+            start,
+            array('I', (o - start for o in ordinals)),
+            array('B', (min(completed_count(log), 255) for log in logs)),
+            xp_deltas,
+            level_up
+        )
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def first_date(self):
+        return ordinal_to_date(self.start)
+
+    @property
+    def last_date(self):
+        return ordinal_to_date(self.start + self.offsets[-1])
+
+    def xp_snapshots(self):
+        xps = array('d')
+        total = 0
+        for delta in self.xp_deltas:
+            total += delta
+            xps.append(total)
+        return xps
+
+    def level_up_flags(self):
+        return array('b', ((self.level_up[i >> 3] >> (i & 7)) & 1 for i in range(len(self))))
+
+    def nbytes(self):
+        """Mémoire occupée (colonnes + forme sérialisée en cache), approximative"""
+        size = sys.getsizeof(self.level_up)
+        size += sum(c.buffer_info()[1] * c.itemsize for c in (self.offsets, self.counts, self.xp_deltas))
+        if self._payload is not None:
+            size += len(self._payload['data'])
+        return size
+
+    def index_range(self, start=None, end=None):
+        """Indices [lo, hi) des jours compris dans [start, end] (ordinaux, bornes optionnelles)"""
+        lo = bisect_left(self.offsets, start - self.start) if start is not None else 0
+        hi = bisect_right(self.offsets, end - self.start) if end is not None else len(self)
+        return lo, hi
+
+    def entries(self):
+        """Entrées reconstituées (sans le détail des tâches : `completed_count` seulement)"""
+        for offset, count, xp, lvl in zip(self.offsets, self.counts, self.xp_snapshots(), self.level_up_flags()):
+            yield {
+                "date": ordinal_to_date(self.start + offset),
+                "completed_count": count,
+                "level_up": bool(lvl),
+                "xp_snapshot": int(xp) if self.xp_deltas.typecode == 'q' else xp
+            }
+
+    def to_payload(self):
+        """Forme JSON : {"start", "days", "data"} ; mise en cache (un segment est immuable)"""
+        if self._payload is None:
+            columns = [self.offsets, self.counts, self.xp_deltas]
+            if sys.byteorder == "big":
+                columns = [array(c.typecode, c) for c in columns]
+                for c in columns:
+                    c.byteswap()
+            raw = _HEADER.pack(len(self), self.xp_deltas.typecode.encode()) + b"".join(c.tobytes() for c in columns)
+            raw += bytes(self.level_up)
+            self._payload = {
+                "start": self.first_date,
+                "days": len(self),
+                "data": base64.b64encode(zlib.compress(raw, 6)).decode("ascii")
+            }
+        return self._payload
+
+    @classmethod
+    def from_payload(cls, payload):
+        raw = zlib.decompress(base64.b64decode(payload['data']))
+        n, typecode = _HEADER.unpack_from(raw)
+        typecode = typecode.decode()
+        pos = _HEADER.size
+        columns = []
+        for code in ('I', 'B', typecode):
+            col = array(code)
+            size = n * col.itemsize
+            col.frombytes(raw[pos:pos + size])
+            if sys.byteorder == "big":
+                col.byteswap()
+            columns.append(col)
+            pos += size
+        segment = cls(date_to_ordinal(payload['start']), *columns, bytearray(raw[pos:]))
+        segment._payload = payload
+        return segment
+
+
+def completed_count(log):
+    """Nombre de tâches validées d'une entrée, complète ou compactée"""
+    if 'tasks_completed' in log:
+        return len(log['tasks_completed'])
+    return log.get('completed_count', 0)
@@ -0,0 +1,234 @@
+"""Journal quotidien indexé par date.
+
+Les entrées récentes restent les dicts du format JSONB `logs`
+({"date", "tasks_completed", "level_up", "xp_snapshot"}) ; seul l'index change :
+un dict date -> entrée pour l'accès direct, et un tableau de dates trié pour
+les requêtes par plage. Les dates "YYYY-MM-DD" se trient lexicographiquement.
+
+L'historique ancien est compacté en segments colonnes (log_segments.py),
+sauvegardés sous la clé JSONB `log_segments` : la taille chargée et la
+mémoire restent bornées quel que soit l'âge du compte.
+
+Les dates ajoutées ou modifiées depuis la dernière sauvegarde sont suivies
+pour la persistance incrémentale (voir storage/delta.py).
+
+Une vue colonnes NumPy (log_columns.py) est construite à la première demande
+puis tenue à jour à chaque `add` : le graphique ne réanalyse pas le journal.
+`version` change à chaque modification et est unique dans le processus (un
+store remplacé, ex. par un import, n'en reprend pas une ancienne) : c'est la
+clé de cache du graphique rendu (charts.chart_fingerprint).
+
+Pour une session inactive, `offload()` déplace les segments vers un stockage
+local (storage/spill.py) et libère la vue colonnes ; les segments sont relus
+au premier accès.
+"""
+import itertools
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, timedelta
+
+from log_columns import LogColumns
+from log_segments import LogSegment, completed_count, date_to_ordinal
+
+RECENT_DAYS = 90          # jours conservés en entrées complètes
+MIN_COMPACT_DAYS = 30     # taille minimale d'un nouveau segment
+
+_VERSIONS = itertools.count(1)   # partagé par tous les stores du processus
+
+
+class LogStore:
+    __slots__ = ("_by_date", "_dates", "_dirty", "_segments", "_columns", "_spill", "_version", "_segments_lock",
+                 "__weakref__")
+
+    def __init__(self, segments=None):
+        self._by_date = {}
+        self._dates = []
+        self._dirty = set()
+        self._segments = list(segments or [])  # LogSegment, du plus ancien au plus récent
+        self._columns = None                   # LogColumns, construit à la demande
+        self._spill = None                     # (SpillStore, clé) tant que les segments sont déchargés
+        self._version = next(_VERSIONS)
+        # `_segments` et `_spill` changent ensemble : offload() tourne sur le thread de
+        # balayage (memory.py) pendant qu'un autre thread peut relire les segments
+        self._segments_lock = threading.RLock()
+
+    @property
+    def segments(self):
+        with self._segments_lock:
+            if self._spill is not None:
+                spill, key = self._spill
+                self._segments = [LogSegment.from_payload(p) for p in spill.take(key)]
+                self._spill = None
+            return self._segments
+
+    @segments.setter
+    def segments(self, segments):
+        with self._segments_lock:
+            self._segments = segments
+            self._spill = None
+            self._version = next(_VERSIONS)
+
+    @property
+    def version(self):
+        """Identifiant du contenu : change à chaque `add` ou remplacement des segments"""
+        return self._version
+
+    @property
+    def offloaded(self):
+        return self._spill is not None
+
+    @classmethod
+    def from_list(cls, logs, segments=None):
+        """Construit l'index depuis la liste JSONB (la première entrée d'une date l'emporte)"""
+        store = cls(segments)
+        for log in logs or []:
+            if log['date'] not in store._by_date:
+                store._by_date[log['date']] = log
+        store._dates = sorted(store._by_date)
+        return store
+
+    @classmethod
+    def from_data(cls, data):
+        """LogStore depuis le document JSONB complet (`logs` + `log_segments`)"""
+        segments = [LogSegment.from_payload(p) for p in data.get('log_segments', [])]
+        return cls.from_list(data.get('logs', []), segments)
+
+    def to_list(self):
+        """Entrées récentes, triées par date, au format JSONB `logs`"""
+        return [self._by_date[d] for d in self._dates]
+
+    def segments_payload(self):
+        """Segments au format JSONB `log_segments`"""
+        return [segment.to_payload() for segment in self.segments]
+
+    def history(self):
+        """Tout l'historique trié : entrées compactées (completed_count) puis récentes"""
+        for segment in self.segments:
+            yield from segment.entries()
+        yield from self.to_list()
+
+    def __len__(self):
+        return sum(len(s) for s in self.segments) + len(self._dates)
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def get(self, date):
+        return self._by_date.get(date)
+
+    def add(self, log):
+        """Ajoute (ou remplace) l'entrée du jour `log['date']`"""
+        date = log['date']
+        if date not in self._by_date:
+            # Cas courant : le jour ajouté est le plus récent -> append O(1)
+            if not self._dates or date > self._dates[-1]:
+                self._dates.append(date)
+                if self._columns is not None:
+                    self._columns.append(*_column_row(log))
+            else:
+                insort(self._dates, date)
+                self._columns = None
+        elif self._columns is not None:
+            index = sum(len(s) for s in self.segments) + bisect_left(self._dates, date)
+            self._columns.set(index, *_column_row(log))
+        self._by_date[date] = log
+        self._dirty.add(date)
+        self._version = next(_VERSIONS)
+        return log
+
+    def dirty_entries(self):
+        return [self._by_date[d] for d in sorted(self._dirty)]
+
+    def clear_dirty(self):
+        self._dirty.clear()
+
+    def between(self, start=None, end=None):
+        """Entrées récentes dont la date est dans [start, end] (bornes optionnelles), triées"""
+        lo = bisect_left(self._dates, start) if start else 0
+        hi = bisect_right(self._dates, end) if end else len(self._dates)
+        return [self._by_date[d] for d in self._dates[lo:hi]]
+
+    def count_between(self, start=None, end=None):
+        """Nombre de jours (compactés compris) dans [start, end], en O(log n)"""
+        lo = bisect_left(self._dates, start) if start else 0
+        hi = bisect_right(self._dates, end) if end else len(self._dates)
+        count = hi - lo
+        start_ord = date_to_ordinal(start) if start else None
+        end_ord = date_to_ordinal(end) if end else None
+        for segment in self.segments:
+            seg_lo, seg_hi = segment.index_range(start_ord, end_ord)
+            count += seg_hi - seg_lo
+        return count
+
+    def last(self):
+        return self._by_date[self._dates[-1]] if self._dates else None
+
+    def chart_columns(self, start=None):
+        """Colonnes du graphique depuis `start` : (ordinaux des dates, nb de tâches
+        validées, xp_snapshot, lvl up), lues directement dans les segments"""
+        ordinals, counts, xps, level_ups = array('l'), array('H'), array('d'), array('b')
+        start_ord = date_to_ordinal(start) if start else None
+        for segment in self.segments:
+            lo, hi = segment.index_range(start_ord)
+            if lo == hi:
+                continue
+            ordinals.extend(segment.start + o for o in segment.offsets[lo:hi])
+            counts.extend(segment.counts[lo:hi].tolist())
+            xps.extend(segment.xp_snapshots()[lo:hi])
+            level_ups.extend(segment.level_up_flags()[lo:hi])
+        for log in self.between(start):
+            ordinals.append(date_to_ordinal(log['date']))
+            counts.append(completed_count(log))
+            xps.append(log['xp_snapshot'])
+            level_ups.append(bool(log['level_up']))
+        return ordinals, counts, xps, level_ups
+
+    def columns(self):
+        """Vue colonnes NumPy de tout l'historique (LogColumns), tenue à jour par `add`"""
+        if self._columns is None:
+            self._columns = LogColumns.from_chart_columns(*self.chart_columns())
+        return self._columns
+
+    def nbytes(self):
+        """Estimation de la mémoire occupée (index, entrées récentes, segments, colonnes)"""
+        size = sys.getsizeof(self._by_date) + sys.getsizeof(self._dates) + sys.getsizeof(self._dirty)
+        for log in self._by_date.values():
+            size += sys.getsizeof(log) + sys.getsizeof(log['date'])
+            if 'tasks_completed' in log:
+                size += sys.getsizeof(log['tasks_completed'])
+        if self._spill is None:
+            size += sum(segment.nbytes() for segment in self._segments)
+        if self._columns is not None:
+            size += self._columns.nbytes()
+        return size
+
+    def offload(self, spill, key):
+        """Décharge les segments dans `spill` sous `key` et libère la vue colonnes
+        (reconstruite à la demande) ; renvoie le nombre d'octets libérés (estimé)"""
+        with self._segments_lock:
+            before = self.nbytes()
+            if self._spill is None and self._segments:
+                spill.put(key, self.segments_payload())
+                self._spill = (spill, key)
+                self._segments = []
+            self._columns = None
+            return before - self.nbytes()
+
+    def compact(self, today, recent_days=RECENT_DAYS, min_days=MIN_COMPACT_DAYS):
+        """Renvoie un nouveau LogStore où les entrées de plus de `recent_days` jours
+        sont regroupées dans un nouveau segment, ou self s'il y en a moins de `min_days`"""
+        cutoff = (date.fromisoformat(today) - timedelta(days=recent_days)).isoformat()
+        n_old = bisect_left(self._dates, cutoff)
+        if n_old < min_days:
+            return self
+        old = [self._by_date[d] for d in self._dates[:n_old]]
+        return LogStore.from_list(
+            [self._by_date[d] for d in self._dates[n_old:]],
+            self.segments + [LogSegment.from_logs(old)]
+        )
+
+
+def _column_row(log):
+    return date_to_ordinal(log['date']), completed_count(log), log['xp_snapshot'], bool(log['level_up'])
@@ -0,0 +1,173 @@
+"""Comptabilité mémoire des sessions et déchargement des sessions inactives.
+
+Chaque rerun d'une session appelle `touch()` avec son journal (LogStore) et
+ses autres données : l'empreinte estimée de la session est mise à jour
+(LogStore.nbytes + taille des autres objets). `sweep()`, lancé au plus toutes
+les `sweep_interval` s depuis n'importe quelle session, décharge l'historique
+ancien (segments, vue colonnes) des sessions inactives depuis plus de
+`idle_seconds` vers un SpillStore ; il est relu au premier accès. Le sweep
+tourne sur un thread à part : le rerun qui le déclenche n'attend pas.
+
+Avec un budget (`budget_bytes`), les sessions les moins récemment actives
+sont aussi déchargées, au-delà de `min_idle_seconds` d'inactivité, tant que
+le total du processus dépasse le budget.
+
+Le registre ne garde que des références faibles vers les journaux : une
+session fermée disparaît du compte, et les segments déchargés d'un journal
+abandonné sont effacés.
+"""
+import itertools
+import sys
+import threading
+import time
+import weakref
+
+
+def deep_sizeof(obj, _depth=0):
+    """Taille approximative d'un objet et de son contenu (dict, list, tuple, set, str...)"""
+    size = sys.getsizeof(obj)
+    if _depth > 8:
+        return size
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, _depth + 1) + deep_sizeof(v, _depth + 1) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, _depth + 1) for item in obj)
+    return size
+
+
+class _Session:
+    __slots__ = ("user_id", "logs", "extra_bytes", "logs_bytes", "last_active", "lock")
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.logs = None            # weakref.ref du LogStore
+        self.extra_bytes = 0
+        self.logs_bytes = 0
+        self.last_active = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return self.logs_bytes + self.extra_bytes
+
+
+class SessionMemory:
+    """Registre du processus (st.cache_resource) ; sûr entre threads"""
+
+    def __init__(self, spill, idle_seconds=900.0, budget_bytes=None, min_idle_seconds=60.0,
+                 sweep_interval=30.0, clock=time.monotonic):
+        self.spill = spill
+        self.idle_seconds = idle_seconds
+        self.budget_bytes = budget_bytes
+        self.min_idle_seconds = min_idle_seconds
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self.offloads = 0
+        self.offloaded_bytes = 0
+        self._sessions = {}         # id de session -> _Session
+        # Réentrant : le rappel d'une référence faible peut survenir pendant un GC déclenché sous le verrou
+        self._lock = threading.RLock()
+        self._last_sweep = 0.0
+        self._sweeping = False
+        self._spill_ids = itertools.count(1)
+
+    def touch(self, session_id, user_id, logs, extra=()):
+        """Début d'un rerun de la session : activité et empreinte (journal + objets `extra`)"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _Session(user_id)
+        with session.lock:
+            # Sous le verrou de la session : un sweep concurrent a fini, ou ne la verra plus inactive
+            session.last_active = self.clock()
+            if session.logs is None or session.logs() is not logs:
+                session.logs = weakref.ref(logs, lambda _, sid=session_id: self._forget(sid))
+            session.logs_bytes = logs.nbytes()
+            session.extra_bytes = sum(deep_sizeof(obj) for obj in extra)
+
+    def _forget(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and session.logs() is None:
+                del self._sessions[session_id]
+
+    def maybe_sweep(self):
+        """Lance un sweep en arrière-plan si le dernier date de plus de `sweep_interval` s"""
+        now = self.clock()
+        with self._lock:
+            if self._sweeping or now - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = now
+            self._sweeping = True
+
+        def run():
+            try:
+                self.sweep()
+            finally:
+                self._sweeping = False
+
+        threading.Thread(target=run, name="memory-sweep", daemon=True).start()
+
+    def sweep(self):
+        """Décharge les sessions inactives, puis les moins récentes tant que le budget est dépassé"""
+        now = self.clock()
+        with self._lock:
+            sessions = sorted(self._sessions.items(), key=lambda item: item[1].last_active)
+        for session_id, session in sessions:
+            if now - session.last_active >= self.idle_seconds:
+                self._offload(session_id, session, self.idle_seconds)
+        if self.budget_bytes is not None:
+            for session_id, session in sessions:
+                if self.total_bytes() <= self.budget_bytes:
+                    break
+                self._offload(session_id, session, self.min_idle_seconds)
+
+    def _offload(self, session_id, session, min_idle):
+        with session.lock:
+            logs = session.logs() if session.logs is not None else None
+            if logs is None or self.clock() - session.last_active < min_idle:
+                return
+            if logs.offloaded:
+                return
+            # Une clé par déchargement : un ancien journal de la session ne peut pas effacer celle d'un nouveau
+            key = f"{session_id}-{next(self._spill_ids)}"
+            freed = logs.offload(self.spill, key)
+            if logs.offloaded:
+                weakref.finalize(logs, self.spill.discard, key)
+            session.logs_bytes = logs.nbytes()
+        if freed > 0:
+            self.offloads += 1
+            self.offloaded_bytes += freed
+
+    def total_bytes(self):
+        with self._lock:
+            return sum(session.nbytes for session in self._sessions.values())
+
+    def report(self):
+        """Total et détail par session, pour le panneau d'exploitation"""
+        now = self.clock()
+        with self._lock:
+            sessions = list(self._sessions.items())
+        spilled_keys, spilled_bytes = self.spill.stats()
+        rows = []
+        for session_id, session in sessions:
+            logs = session.logs() if session.logs is not None else None
+            rows.append({
+                "session": session_id,
+                "user": session.user_id,
+                "bytes": session.nbytes,
+                "idle_s": round(now - session.last_active, 1),
+                "offloaded": bool(logs is not None and logs.offloaded),
+            })
+        total = sum(row["bytes"] for row in rows)
+        return {
+            "sessions": len(rows),
+            "total_bytes": total,
+            "budget_bytes": self.budget_bytes,
+            "over_budget": self.budget_bytes is not None and total > self.budget_bytes,
+            "spilled_sessions": spilled_keys,
+            "spilled_bytes": spilled_bytes,
+            "offloads": self.offloads,
+            "offloaded_bytes": self.offloaded_bytes,
+            "per_session": sorted(rows, key=lambda row: -row["bytes"]),
+        }
@@ -0,0 +1,201 @@
+"""Instrumentation des reruns (opt-in : LEVEL_CRUSH_PROFILE=1 ou secret PROFILE).
+
+Chaque rerun ouvre une trace : les sections marquées par `section(name)` /
+`@profiled(name)` et les appels au backend (ProfiledBackend) y sont
+chronométrés. À la fin du rerun, la trace est émise en une ligne JSON et ses
+durées alimentent des fenêtres glissantes par section, d'où les p50/p95 du
+processus.
+
+Désactivé, `section()` ne coûte qu'une lecture de thread-local.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+ENV_VAR = "LEVEL_CRUSH_PROFILE"
+
+_local = threading.local()
+
+
+def profiling_enabled(environ=os.environ):
+    return environ.get(ENV_VAR, "").lower() in ("1", "true", "yes", "on")
+
+
+def _percentile(sorted_values, q):
+    """Percentile au rang le plus proche d'une liste triée non vide"""
+    index = max(int(round(q * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class Profiler:
+    """Agrégats du processus ; partagé entre sessions (st.cache_resource)"""
+
+    def __init__(self, enabled, window=2048, emit=print):
+        self.enabled = enabled
+        self.window = window
+        self.emit = emit
+        self._samples = {}   # nom -> deque de durées (s)
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def start_rerun(self, session_id):
+        """Ouvre la trace du rerun courant (thread du script)"""
+        trace = RerunTrace(self, session_id)
+        _local.trace = trace
+        return trace
+
+    def record(self, name, seconds):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def db_call(self, table, op, payload_bytes, seconds, error=None):
+        call = {
+            "table": table,
+            "op": op,
+            "bytes": payload_bytes,
+            "ms": round(seconds * 1000, 2),
+        }
+        if error is not None:
+            call["error"] = error
+        self.record(f"db.{table}.{op}", seconds)
+        trace = getattr(_local, "trace", None)
+        if trace is not None and not trace.finished:
+            trace.db_calls.append(call)
+        else:
+            # Appel hors d'un rerun (file d'écriture, rafraîchissement des citations)
+            self.emit(json.dumps({"event": "db_call", "thread": threading.current_thread().name, **call}))
+
+    def stats(self):
+        """[{"name", "count", "p50_ms", "p95_ms", "max_ms"}] sur la fenêtre glissante"""
+        with self._lock:
+            snapshot = {name: (sorted(samples), self._counts[name]) for name, samples in self._samples.items()}
+        return [
+            {
+                "name": name,
+                "count": count,
+                "p50_ms": round(_percentile(values, 0.50) * 1000, 2),
+                "p95_ms": round(_percentile(values, 0.95) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+            for name, (values, count) in sorted(snapshot.items())
+        ]
+
+
+class RerunTrace:
+    __slots__ = ("profiler", "session_id", "started", "sections", "db_calls", "finished")
+
+    def __init__(self, profiler, session_id):
+        self.profiler = profiler
+        self.session_id = session_id
+        self.started = time.perf_counter()
+        self.sections = {}     # nom -> durée cumulée (s)
+        self.db_calls = []
+        self.finished = False
+
+    def add(self, name, seconds):
+        self.sections[name] = self.sections.get(name, 0.0) + seconds
+
+    def summary(self):
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "sections_ms": {name: round(s * 1000, 2) for name, s in self.sections.items()},
+            "db_calls": list(self.db_calls),
+        }
+
+    def finish(self, status="complete"):
+        """Clôture le rerun : agrégats + une ligne JSON. `status` vaut "interrupted"
+        pour un rerun coupé par st.stop() / st.rerun() (clôturé au rerun suivant)"""
+        if self.finished:
+            return
+        self.finished = True
+        total = time.perf_counter() - self.started
+        for name, seconds in self.sections.items():
+            self.profiler.record(name, seconds)
+        if status == "complete":
+            self.profiler.record("rerun", total)
+        if getattr(_local, "trace", None) is self:
+            _local.trace = None
+        self.profiler.emit(json.dumps({
+            "event": "rerun",
+            "session": self.session_id,
+            "status": status,
+            **self.summary(),
+        }))
+
+
+@contextmanager
+def section(name):
+    """Chronomètre un bloc dans la trace du rerun courant (sans effet hors profilage)"""
+    trace = getattr(_local, "trace", None)
+    if trace is None or trace.finished:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - t0)
+
+
+def profiled(name):
+    """Décorateur : la fonction entière est une section"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with section(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _size(obj):
+    return len(json.dumps(obj, default=str).encode()) if obj is not None else 0
+
+
+class ProfiledBackend:
+    """Enveloppe un backend (storage/backends.py) : table, opération, octets et latence de chaque appel"""
+
+    def __init__(self, backend, profiler):
+        self.backend = backend
+        self.profiler = profiler
+        self.table_name = getattr(backend, "table_name", "data")
+
+    def _call(self, table, op, fn, *args, payload=None, result_size=False):
+        t0 = time.perf_counter()
+        try:
+            result = fn(*args)
+        except Exception as e:
+            self.profiler.db_call(table, op, _size(payload), time.perf_counter() - t0, error=type(e).__name__)
+            raise
+        elapsed = time.perf_counter() - t0
+        self.profiler.db_call(table, op, _size(result) if result_size else _size(payload), elapsed)
+        return result
+
+    def load(self, user_id):
+        return self._call(self.table_name, "select", self.backend.load, user_id, result_size=True)
+
+    def save(self, user_id, data):
+        return self._call(self.table_name, "upsert", self.backend.save, user_id, data, payload=data)
+
+    def apply(self, user_id, fields, logs):
+        rpc = getattr(self.backend, "delta_rpc", "apply")
+        return self._call(rpc, "rpc", self.backend.apply, user_id, fields, logs,
+                          payload={"fields": fields, "logs": logs})
+
+    def fetch_citations(self, quote_type):
+        return self._call("citations", "select", self.backend.fetch_citations, quote_type, result_size=True)
+
+    def load_page(self, after_user_id, limit):
+        return self._call(self.table_name, "select_page", self.backend.load_page, after_user_id, limit,
+                          result_size=True)
+
+    def save_many(self, rows):
+        return self._call(self.table_name, "upsert_many", self.backend.save_many, rows, payload=rows)
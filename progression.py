@@ -0,0 +1,94 @@
+"""Moteur de progression piloté par config.json.
+
+La configuration est compilée en un objet `Progression` immuable : table d'XP
+cumulée, paliers de titres et nombre de slots par niveau. Chaque appel à
+`load_progression(path)` compile le fichier demandé (ex. une config
+alternative pour simulation.py --config) ; c'est l'appelant qui partage le
+résultat : app.py le met en cache par processus et ne le recompile que si
+config.json change.
+"""
+import json
+import os
+from bisect import bisect_right
+from dataclasses import dataclass
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+
+
+@dataclass(frozen=True)
+class Progression:
+    task_xp: int
+    penalty_mode: str
+    max_level: int
+    xp_table: tuple        # xp_table[lvl] = XP totale requise pour atteindre lvl
+    title_levels: tuple    # niveaux de déblocage, triés (bisectables)
+    titles: tuple          # (nom, couleur) alignés sur title_levels
+    slot_table: tuple      # slot_table[lvl] = nombre de slots de tâches
+
+    def get_total_xp_required(self, target_level):
+        """XP totale requise pour atteindre `target_level` (plafonnée au niveau max)"""
+        if target_level <= 1: return 0
+        return self.xp_table[min(target_level, self.max_level)]
+
+    def level_for_xp(self, xp):
+        """Niveau atteint avec `xp` points, par recherche dichotomique"""
+        return min(max(bisect_right(self.xp_table, xp) - 1, 1), self.max_level)
+
+    def rank_for_level(self, level):
+        """(titre, couleur) du palier atteint au niveau `level`"""
+        idx = bisect_right(self.title_levels, level) - 1
+        if idx < 0: return "Inconnu", "#000000"
+        return self.titles[idx]
+
+    def max_slots(self, level):
+        return self.slot_table[min(max(level, 0), self.max_level)]
+
+
+def make_level_cost(settings):
+    """Construit la fonction de coût par niveau à partir des réglages"""
+    exponent = settings["exponent"]
+    low_max, mid_max = settings["low_max_level"], settings["mid_max_level"]
+    coeff_low, coeff_mid, coeff_high = settings["coeff_low"], settings["coeff_mid"], settings["coeff_high"]
+
+    def get_level_cost(level):
+        coeff = coeff_high
+        if level <= low_max: coeff = coeff_low
+        elif level <= mid_max: coeff = coeff_mid
+        return coeff * (level ** exponent)
+
+    return get_level_cost
+
+
+def _build_xp_table(get_level_cost, max_level):
+    # table[0] sert de sentinelle pour la recherche dichotomique
+    table = [0.0, 0.0]
+    for lvl in range(1, max_level - 1):
+        table.append(table[-1] + get_level_cost(lvl))
+    # Le dernier niveau coûte le double du cumul précédent
+    table.append(table[-1] * 2)
+    return tuple(table)
+
+
+def compile_progression(config):
+    """Compile le dict de configuration en un objet Progression"""
+    settings = config["settings"]
+    prog = config["progression"]
+    max_level = prog["max_level"]
+
+    titles = sorted(prog["titles"], key=lambda t: t["level"])
+    slot_table = tuple(prog["base_slots"] + lvl // prog["levels_per_slot"] for lvl in range(max_level + 1))
+
+    return Progression(
+        task_xp=settings["base_xp"],
+        penalty_mode=settings["penalty_mode"],
+        max_level=max_level,
+        xp_table=_build_xp_table(make_level_cost(settings), max_level),
+        title_levels=tuple(t["level"] for t in titles),
+        titles=tuple((t["name"], t["color"]) for t in titles),
+        slot_table=slot_table,
+    )
+
+
+def load_progression(path=CONFIG_PATH):
+    with open(path, encoding="utf-8") as f:
+        return compile_progression(json.load(f))
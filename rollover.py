@@ -0,0 +1,180 @@
+"""Passage au jour suivant pour tous les comptes (batch nocturne).
+
+Parcourt la table des données joueur par pages (pagination par user_id),
+applique à chaque compte les mêmes règles que le bouton « Sauter un jour »
+(engine.catch_up_to, pénalité Exalté comprise) jusqu'à la date cible, compacte
+l'historique ancien (log_store.py), puis réécrit chaque page modifiée en un seul
+upsert groupé. Le calcul est réparti sur un pool de processus.
+
+Les comptes dont une session est ouverte (bail `active_until` écrit par
+app.py, pas encore expiré) sont sautés : la file d'écriture de la session
+écraserait le résultat avec un état d'avant le rollover. La session fait
+elle-même le rattrapage au prochain chargement.
+
+Un fichier de checkpoint garde le dernier user_id écrit : relancer la même
+commande après un crash reprend là où le batch s'était arrêté.
+
+Usage : SUPABASE_URL=... SUPABASE_KEY=... python rollover.py [--date YYYY-MM-DD]
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+
+import engine
+from engine import PlayerState
+from log_store import LogStore
+from progression import CONFIG_PATH, load_progression
+from storage import SupabaseBackend
+
+_PROG = None   # Progression du processus worker
+
+
+def _init_worker(config_path):
+    global _PROG
+    _PROG = load_progression(config_path)
+
+
+def roll_user(data, target_date, prog):
+    """Avance un compte jusqu'à `target_date` ; renvoie le nouveau `data` ou None si rien à faire"""
+    state = PlayerState(
+        tasks=tuple(data.get('tasks', [])),
+        user_xp=data.get('user_xp', 0),
+        user_lvl=data.get('user_lvl', 1),
+        game_mode=data.get('game_mode', "Séide"),
+        current_date=data.get('current_date', target_date)
+    )
+    if state.current_date >= target_date:
+        return None
+
+    logs = LogStore.from_data(data)
+    state, new_logs, _ = engine.catch_up_to(state, prog, target_date, logs.get(state.current_date))
+    for log in new_logs:
+        logs.add(log)
+    logs = logs.compact(target_date)
+
+    return {
+        **data,
+        "tasks": list(state.tasks),
+        "logs": logs.to_list(),
+        "log_segments": logs.segments_payload(),
+        "user_xp": state.user_xp,
+        "user_lvl": state.user_lvl,
+        "current_date": state.current_date
+    }
+
+
+def is_active(data, now):
+    """Une session de l'app tient encore le compte (bail `active_until` non expiré)"""
+    until = data.get('active_until')
+    return until is not None and datetime.fromisoformat(until) > now
+
+
+def _roll_in_worker(data, target_date):
+    return roll_user(data, target_date, _PROG)
+
+
+def load_checkpoint(path, target_date):
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('target_date') == target_date:
+            return checkpoint
+    return {"target_date": target_date, "last_user_id": None, "processed": 0, "updated": 0, "skipped_active": 0,
+            "done": False}
+
+
+def save_checkpoint(path, checkpoint):
+    if not path:
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)   # écriture atomique
+
+
+def run_rollover(backend, target_date, config_path=CONFIG_PATH, page_size=500, workers=None,
+                 checkpoint_path=None, log=print):
+    """Lance (ou reprend) le batch ; renvoie le checkpoint final enrichi du débit"""
+    checkpoint = load_checkpoint(checkpoint_path, target_date)
+    if checkpoint['done']:
+        log(f"Rollover du {target_date} déjà terminé ({checkpoint['processed']} comptes).")
+        return checkpoint
+    checkpoint.setdefault('skipped_active', 0)
+    if checkpoint['last_user_id'] is not None:
+        log(f"Reprise après {checkpoint['last_user_id']} ({checkpoint['processed']} comptes déjà traités).")
+
+    pool = None
+    if workers == 0:
+        prog = load_progression(config_path)
+        roll = partial(roll_user, target_date=target_date, prog=prog)
+        run_page = lambda datas: map(roll, datas)
+    else:
+        pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(config_path,))
+        roll = partial(_roll_in_worker, target_date=target_date)
+        chunksize = max(page_size // (4 * (workers or os.cpu_count() or 1)), 1)
+        run_page = lambda datas: pool.map(roll, datas, chunksize=chunksize)
+
+    t0 = time.perf_counter()
+    processed = 0
+    try:
+        while True:
+            page = backend.load_page(checkpoint['last_user_id'], page_size)
+            if not page:
+                break
+            now = datetime.now(timezone.utc)
+            idle = [(user_id, data) for user_id, data in page if not is_active(data, now)]
+            results = run_page([data for _, data in idle])
+            rows = [(user_id, new_data) for (user_id, _), new_data in zip(idle, results) if new_data is not None]
+            backend.save_many(rows)
+
+            processed += len(page)
+            checkpoint['last_user_id'] = page[-1][0]
+            checkpoint['processed'] += len(page)
+            checkpoint['updated'] += len(rows)
+            checkpoint['skipped_active'] += len(page) - len(idle)
+            save_checkpoint(checkpoint_path, checkpoint)
+
+            elapsed = time.perf_counter() - t0
+            log(f"{checkpoint['processed']} comptes ({checkpoint['updated']} mis à jour, "
+                f"{checkpoint['skipped_active']} en session), "
+                f"{processed / elapsed:.0f} comptes/s")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    checkpoint['done'] = True
+    save_checkpoint(checkpoint_path, checkpoint)
+    elapsed = time.perf_counter() - t0
+    checkpoint['elapsed_s'] = elapsed
+    checkpoint['users_per_s'] = processed / elapsed if elapsed else 0.0
+    log(f"Terminé : {processed} comptes en {elapsed:.1f}s ({checkpoint['users_per_s']:.0f} comptes/s)")
+    return checkpoint
+
+
+def backend_from_env():
+    from storage.supabase_client import create_supabase_client, make_http_client
+    http_client, _ = make_http_client()
+    client = create_supabase_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"], http_client)
+    return SupabaseBackend(client, os.environ.get("SUPABASE_TABLE", "user_data"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rollover quotidien de tous les comptes")
+    parser.add_argument("--date", default=datetime.today().strftime("%Y-%m-%d"),
+                        help="date cible (défaut : aujourd'hui)")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None, help="0 = sans pool de processus")
+    parser.add_argument("--checkpoint", default="rollover.checkpoint.json")
+    parser.add_argument("--config", default=CONFIG_PATH)
+    args = parser.parse_args(argv)
+
+    run_rollover(backend_from_env(), args.date, config_path=args.config, page_size=args.page_size,
+                 workers=args.workers, checkpoint_path=args.checkpoint)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Simulateur Monte Carlo de progression, pour équilibrer config.json.
+
+Simule des milliers de joueurs synthétiques : chaque joueur a une probabilité
+quotidienne de valider chaque tâche (tirée uniformément dans `p_range`), en
+mode Séide ou Exalté. Les règles viennent du même objet Progression que l'app
+(table d'XP, slots, titres, XP par tâche, mode à pénalité) :
+
+- validation : +task_xp par tâche (engine.validate_task) ;
+- fin de journée en mode pénalité : -task_xp par tâche manquée, XP plancher 0
+  (engine.apply_exalte_penalty) ;
+- le niveau de fin de journée vaut toujours prog.level_for_xp(xp) : la montée
+  (max) puis la redescente (min) d'engine.check_levelup / apply_exalte_penalty
+  se simplifient ainsi, puisque le niveau de la veille vaut déjà
+  level_for_xp de l'XP de la veille.
+
+Deux modèles de nombre de tâches :
+
+- `tasks=N` fixe : tout est vectorisé sur joueurs x jours (sommes cumulées ;
+  en mode pénalité, XP plancher 0 = somme cumulée moins son minimum courant) ;
+- `tasks="slots"` : le joueur remplit chaque slot débloqué (prog.max_slots), le
+  nombre de tâches dépend donc du niveau de la veille ; boucle sur les jours,
+  vectorisée sur les joueurs.
+
+Les joueurs sont découpés en lots, répartis si besoin sur un pool de processus
+(une graine indépendante par lot). `check_with_engine` rejoue quelques joueurs
+avec engine.validate_task / engine.skip_day et compare XP et niveau jour par jour.
+
+Usage : python simulation.py [--players 100000] [--days 365] [--tasks slots|N]
+        [--p 0.5 0.95] [--modes Séide Exalté] [--workers 0] [--check 20] [--json out.json]
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from functools import partial
+
+import numpy as np
+
+import engine
+from engine import PlayerState
+from progression import CONFIG_PATH, load_progression
+
+MODES = ("Séide", "Exalté")
+CHUNK_PLAYERS = 10000
+PERCENTILES = (10, 50, 90)
+
+
+def levels_for_xp(prog, xp):
+    """prog.level_for_xp sur un tableau d'XP"""
+    table = np.asarray(prog.xp_table)
+    return np.clip(np.searchsorted(table, xp, side="right") - 1, 1, prog.max_level)
+
+
+def _first_days(max_lvl_to_date, title_levels):
+    """Jour (1 = fin du premier jour) où chaque titre est atteint, -1 sinon ; 0 pour les titres de départ"""
+    days = max_lvl_to_date.shape[1]
+    first = np.empty((max_lvl_to_date.shape[0], len(title_levels)), dtype=np.int32)
+    for k, level in enumerate(title_levels):
+        if level <= 1:
+            first[:, k] = 0
+            continue
+        not_yet = (max_lvl_to_date < level).sum(axis=1)
+        first[:, k] = np.where(not_yet < days, not_yet + 1, -1)
+    return first
+
+
+def _run_fixed(prog, p, days, n_tasks, penalize, rng):
+    """Nombre de tâches constant : tout le tableau joueurs x jours d'un coup"""
+    done = rng.binomial(n_tasks, p[:, None], size=(len(p), days))
+    n = np.full_like(done, n_tasks)
+    delta = done * prog.task_xp
+    if penalize and n_tasks > 0:
+        delta -= (n_tasks - done) * prog.task_xp
+    xp = np.cumsum(delta, axis=1)
+    if penalize:
+        # x_t = max(x_{t-1} + d_t, 0)  <=>  x_t = S_t - min(0, min_{s<=t} S_s)
+        xp -= np.minimum(np.minimum.accumulate(xp, axis=1), 0)
+    return done, n, xp, levels_for_xp(prog, xp)
+
+
+def _run_slots(prog, p, days, penalize, rng):
+    """Un slot = une tâche : le nombre de tâches suit le niveau de la veille"""
+    slots = np.asarray(prog.slot_table)
+    players = len(p)
+    # Tableaux jours x joueurs (une ligne écrite par jour), transposés au retour
+    done = np.empty((days, players), dtype=np.int64)
+    n = np.empty_like(done)
+    xp_days = np.empty_like(done)
+    lvl_days = np.empty_like(done)
+    xp = np.zeros(players, dtype=np.int64)
+    lvl = np.ones(players, dtype=np.int64)
+    for day in range(days):
+        n[day] = slots[lvl]
+        done[day] = rng.binomial(n[day], p)
+        xp += done[day] * prog.task_xp
+        if penalize:
+            xp -= (n[day] - done[day]) * prog.task_xp
+            np.maximum(xp, 0, out=xp)
+        lvl = levels_for_xp(prog, xp)
+        xp_days[day], lvl_days[day] = xp, lvl
+    return done.T, n.T, xp_days.T, lvl_days.T
+
+
+def simulate_chunk(prog, players, days, p_range, mode, tasks, seed, keep=0):
+    """Un lot de joueurs -> dict de tableaux par joueur (+ `sample` : trajectoires des `keep` premiers)"""
+    rng = np.random.default_rng(seed)
+    p = rng.uniform(p_range[0], p_range[1], size=players)
+    penalize = mode == prog.penalty_mode
+    if tasks == "slots":
+        done, n, xp, lvl = _run_slots(prog, p, days, penalize, rng)
+    else:
+        done, n, xp, lvl = _run_fixed(prog, p, days, int(tasks), penalize, rng)
+
+    previous = np.concatenate((np.ones((players, 1), dtype=lvl.dtype), lvl[:, :-1]), axis=1)
+    drops = np.maximum(previous - lvl, 0)
+    result = {
+        "first_day": _first_days(np.maximum.accumulate(lvl, axis=1), prog.title_levels),
+        "drop_days": (drops > 0).sum(axis=1),
+        "levels_lost": drops.sum(axis=1),
+        "max_drop": drops.max(axis=1),
+        "final_lvl": lvl[:, -1],
+    }
+    if keep:
+        result["sample"] = {"done": done[:keep], "n": n[:keep], "xp": xp[:keep], "lvl": lvl[:keep]}
+    return result
+
+
+def simulate(prog, players, days, p_range=(0.5, 0.95), mode="Séide", tasks="slots", seed=0,
+             workers=0, chunk=CHUNK_PLAYERS, keep=0):
+    """Simule `players` joueurs sur `days` jours -> résultats par joueur concaténés.
+
+    `workers=0` calcule dans le processus courant ; sinon les lots sont répartis
+    sur un ProcessPoolExecutor (`workers=None` : un processus par cœur).
+    """
+    sizes = [min(chunk, players - start) for start in range(0, players, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    run = partial(simulate_chunk, prog, days=days, p_range=p_range, mode=mode, tasks=tasks)
+    keeps = [keep if i == 0 else 0 for i in range(len(sizes))]
+    if workers == 0:
+        chunks = [run(size, seed=s, keep=k) for size, s, k in zip(sizes, seeds, keeps)]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            chunks = list(pool.map(partial(_run_chunk, run), sizes, seeds, keeps))
+
+    merged = {key: np.concatenate([c[key] for c in chunks]) for key in chunks[0] if key != "sample"}
+    if keep:
+        merged["sample"] = chunks[0]["sample"]
+    return merged
+
+
+def _run_chunk(run, size, seed, keep):
+    return run(size, seed=seed, keep=keep)
+
+
+def summarize(prog, result, days):
+    """Distribution des jours par titre et des pertes de niveau, sérialisable en JSON"""
+    players = len(result["final_lvl"])
+    titles = []
+    for k, (level, (name, _)) in enumerate(zip(prog.title_levels, prog.titles)):
+        first = result["first_day"][:, k]
+        reached = first[first >= 0]
+        titles.append({
+            "title": name,
+            "level": level,
+            "reached": round(len(reached) / players, 4),
+            **{f"p{q}_days": (int(np.percentile(reached, q)) if len(reached) else None) for q in PERCENTILES},
+        })
+    dropped = result["drop_days"] > 0
+    return {
+        "players": players,
+        "days": days,
+        "titles": titles,
+        "level_drops": {
+            "players_with_drop": round(float(dropped.mean()), 4),
+            "drop_days_per_year": round(float(result["drop_days"].mean() * 365 / days), 3),
+            **{f"p{q}_levels_lost": int(np.percentile(result["levels_lost"], q)) for q in PERCENTILES},
+            "max_single_drop": int(result["max_drop"].max()),
+        },
+        "final_level": {f"p{q}": int(np.percentile(result["final_lvl"], q)) for q in PERCENTILES},
+    }
+
+
+def check_with_engine(prog, sample, mode):
+    """Rejoue les trajectoires échantillonnées avec le moteur de l'app ; renvoie les écarts (joueur, jour)"""
+    mismatches = []
+    for i in range(len(sample["done"])):
+        state = PlayerState(game_mode=mode, current_date="2000-01-01")
+        for day in range(sample["done"].shape[1]):
+            n = int(sample["n"][i, day])
+            state = replace(state, tasks=tuple({"id": t, "name": f"Tâche {t}"} for t in range(1, n + 1)))
+            log = None
+            for task_id in range(1, int(sample["done"][i, day]) + 1):
+                state, log, _ = engine.validate_task(state, prog, task_id, state.current_date, log)
+            state, _, _ = engine.skip_day(state, prog, log)
+            if state.user_xp != sample["xp"][i, day] or state.user_lvl != sample["lvl"][i, day]:
+                mismatches.append((i, day))
+                break
+    return mismatches
+
+
+def print_summary(mode, summary, elapsed, log=print):
+    log(f"\n== {mode} : {summary['players']} joueurs x {summary['days']} jours ({elapsed:.2f}s) ==")
+    log(f"{'Titre':<24}{'niv.':>5}{'atteint':>9}" + "".join(f"{f'p{q} (j)':>10}" for q in PERCENTILES))
+    for t in summary["titles"]:
+        log(f"{t['title']:<24}{t['level']:>5}{t['reached']:>9.1%}"
+            + "".join(f"{t[f'p{q}_days'] if t[f'p{q}_days'] is not None else '-':>10}" for q in PERCENTILES))
+    drops = summary["level_drops"]
+    log(f"Pertes de niveau : {drops['players_with_drop']:.1%} des joueurs, "
+        f"{drops['drop_days_per_year']} jours de perte / an, "
+        f"niveaux perdus p50/p90 {drops['p50_levels_lost']}/{drops['p90_levels_lost']}, "
+        f"pire chute {drops['max_single_drop']}")
+    final = summary["final_level"]
+    log(f"Niveau final p10/p50/p90 : {final['p10']}/{final['p50']}/{final['p90']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulation Monte Carlo de la progression")
+    parser.add_argument("--config", default=CONFIG_PATH)
+    parser.add_argument("--players", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--tasks", default="slots", help='"slots" (un par slot débloqué) ou un nombre fixe')
+    parser.add_argument("--p", type=float, nargs=2, default=(0.5, 0.95), metavar=("MIN", "MAX"),
+                        help="probabilité quotidienne de valider une tâche, tirée par joueur")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=0, help="0 = sans pool de processus")
+    parser.add_argument("--check", type=int, default=0, help="joueurs rejoués avec engine pour vérification")
+    parser.add_argument("--json", help="fichier de résultats à écrire")
+    args = parser.parse_args(argv)
+
+    prog = load_progression(args.config)
+    report = {}
+    for mode in args.modes:
+        t0 = time.perf_counter()
+        result = simulate(prog, args.players, args.days, args.p, mode, args.tasks, args.seed,
+                          workers=args.workers, keep=args.check)
+        elapsed = time.perf_counter() - t0
+        report[mode] = summarize(prog, result, args.days)
+        print_summary(mode, report[mode], elapsed)
+        if args.check:
+            mismatches = check_with_engine(prog, result["sample"], mode)
+            print(f"Vérification moteur ({args.check} joueurs) : "
+                  + ("OK" if not mismatches else f"{len(mismatches)} écart(s), ex. {mismatches[:3]}"))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Démarrage à froid : imports différés et rapport d'import façon `-X importtime`.
+
+`lazy_import` charge un module lourd au premier besoin et note sa durée dans
+IMPORT_TIMES (affiché dans les Dev Tools). Pour une ventilation complète,
+lancer :
+
+    python startup.py [modules...]
+"""
+import argparse
+import importlib
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ["streamlit", "pandas", "matplotlib.pyplot", "supabase"]
+
+IMPORT_TIMES = {}   # module -> durée (s) de son premier import différé dans ce processus
+
+
+def lazy_import(name):
+    """Importe `name` au premier appel et mesure le coût de cet import"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    t0 = time.perf_counter()
+    module = importlib.import_module(name)
+    IMPORT_TIMES[name] = time.perf_counter() - t0
+    return module
+
+
+def importtime_report(modules=HEAVY_MODULES, top=20):
+    """Importe `modules` dans un interpréteur neuf avec -X importtime.
+
+    Renvoie [(cumul_us, self_us, module)] trié par coût cumulé décroissant.
+    """
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # ligne d'en-tête
+        rows.append((int(parts[1]), int(parts[0]), parts[2].rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rapport de temps d'import des dépendances lourdes")
+    parser.add_argument("modules", nargs="*", default=HEAVY_MODULES)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(f"{'cumul (ms)':>11} {'propre (ms)':>12}  module")
+    for cumulative, self_us, name in importtime_report(args.modules, args.top):
+        print(f"{cumulative / 1000:>11.1f} {self_us / 1000:>12.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
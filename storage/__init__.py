@@ -0,0 +1,11 @@
+from storage.backends import MemoryBackend, SupabaseBackend, merge_logs
+from storage.delta import DeltaSaver, PendingWrite
+from storage.local_auth import LocalAuthClient, LocalAuthError
+from storage.queue import WriteBehindQueue
+from storage.spill import SpillStore
+from storage.sqlite_backend import SqliteBackend
+
+__all__ = [
+    "DeltaSaver", "LocalAuthClient", "LocalAuthError", "MemoryBackend", "PendingWrite", "SpillStore",
+    "SqliteBackend", "SupabaseBackend", "WriteBehindQueue", "merge_logs",
+]
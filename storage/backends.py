@@ -0,0 +1,107 @@
+"""Backends de persistance des données joueur.
+
+Chaque backend expose la même interface :
+- load(user_id) -> dict `data` ou None
+- save(user_id, data) : écriture complète du document
+- apply(user_id, fields, logs) : écriture partielle (champs modifiés +
+  entrées de journal ajoutées/modifiées, fusionnées par date)
+- fetch_citations(quote_type) : citations {"text", "author"} d'un type
+- load_page(after_user_id, limit) : [(user_id, data)] triés par user_id
+  (pagination par clé, pour les traitements batch)
+- save_many(rows) : écriture complète groupée de [(user_id, data)]
+"""
+import copy
+
+
+def merge_logs(existing, changed):
+    """Fusionne des entrées de journal par date (les nouvelles l'emportent), triées"""
+    by_date = {log['date']: log for log in existing}
+    for log in changed:
+        by_date[log['date']] = log
+    return [by_date[d] for d in sorted(by_date)]
+
+
+class SupabaseBackend:
+    """Table Supabase (user_id, data JSONB)"""
+
+    def __init__(self, client, table_name, delta_rpc="apply_data_delta"):
+        self.client = client
+        self.table_name = table_name
+        self.delta_rpc = delta_rpc
+
+    def load(self, user_id):
+        response = self.client.table(self.table_name).select("data").eq("user_id", user_id).execute()
+        if response.data and len(response.data) > 0:
+            return response.data[0]['data']
+        return None
+
+    def save(self, user_id, data):
+        self.client.table(self.table_name).upsert({
+            "user_id": user_id,
+            "data": data
+        }).execute()
+
+    def apply(self, user_id, fields, logs):
+        # Fusion côté serveur : voir supabase/apply_data_delta.sql
+        self.client.rpc(self.delta_rpc, {
+            "p_user_id": user_id,
+            "p_fields": fields,
+            "p_logs": logs
+        }).execute()
+
+    def load_page(self, after_user_id, limit):
+        query = self.client.table(self.table_name).select("user_id, data").order("user_id").limit(limit)
+        if after_user_id is not None:
+            query = query.gt("user_id", after_user_id)
+        return [(row['user_id'], row['data']) for row in query.execute().data or []]
+
+    def save_many(self, rows):
+        if rows:
+            self.client.table(self.table_name).upsert(
+                [{"user_id": user_id, "data": data} for user_id, data in rows]
+            ).execute()
+
+    def fetch_citations(self, quote_type):
+        response = self.client.table("citations").select("text, author").eq("type", quote_type).execute()
+        return response.data or []
+
+
+class MemoryBackend:
+    """Backend en mémoire, pour le développement et les tests sans Supabase"""
+
+    def __init__(self, citations=None):
+        self.rows = {}
+        self.citations = citations or {}   # type -> liste de {"text", "author"}
+        self.calls = []
+
+    def load(self, user_id):
+        self.calls.append(("load", user_id))
+        data = self.rows.get(user_id)
+        return copy.deepcopy(data) if data is not None else None
+
+    def save(self, user_id, data):
+        self.calls.append(("save", user_id))
+        self.rows[user_id] = copy.deepcopy(data)
+
+    def apply(self, user_id, fields, logs):
+        self.calls.append(("apply", user_id))
+        # Même sémantique que supabase/apply_data_delta.sql : p_logs fusionné sur
+        # fields['logs'] s'il est fourni, sinon sur le journal enregistré
+        data = self.rows.setdefault(user_id, {})
+        base = fields['logs'] if 'logs' in fields else data.get('logs', [])
+        data.update(copy.deepcopy(fields))
+        data['logs'] = merge_logs(copy.deepcopy(base), copy.deepcopy(logs))
+
+    def fetch_citations(self, quote_type):
+        self.calls.append(("fetch_citations", quote_type))
+        return list(self.citations.get(quote_type, []))
+
+    def load_page(self, after_user_id, limit):
+        self.calls.append(("load_page", after_user_id))
+        user_ids = sorted(u for u in self.rows if after_user_id is None or u > after_user_id)[:limit]
+        return [(u, copy.deepcopy(self.rows[u])) for u in user_ids]
+
+    def save_many(self, rows):
+        self.calls.append(("save_many", len(rows)))
+        for user_id, data in rows:
+            self.rows[user_id] = copy.deepcopy(data)
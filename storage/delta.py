@@ -0,0 +1,109 @@
+"""Sauvegarde incrémentale : n'envoie au backend que ce qui a changé.
+
+Les champs scalaires (XP, niveau, tâches, profil...) sont comparés au dernier
+état persisté ; les entrées de journal modifiées sont suivies par le LogStore.
+
+L'écriture se fait en deux temps : `capture()` fige (copie) ce qui a changé
+depuis le thread du script, `send()` l'envoie au backend. Cela permet
+d'envoyer depuis un autre thread (voir storage/queue.py).
+"""
+import copy
+
+from log_store import LogStore
+from storage.backends import merge_logs
+
+_MISSING = object()
+
+
+class PendingWrite:
+    """Écriture en attente : document complet (`full`) ou delta (champs + journal par date)"""
+    __slots__ = ("full", "fields", "logs")
+
+    def __init__(self, full=None, fields=None, logs=None):
+        self.full = full
+        self.fields = fields or {}
+        self.logs = logs or {}
+
+    def merge(self, newer):
+        """Combine avec une écriture plus récente (la plus récente l'emporte)"""
+        if newer.full is not None:
+            return newer
+        if self.full is not None:
+            full = dict(self.full, **newer.fields)
+            full['logs'] = merge_logs(full.get('logs', []), newer.logs.values())
+            return PendingWrite(full=full)
+        return PendingWrite(fields=dict(self.fields, **newer.fields), logs={**self.logs, **newer.logs})
+
+
+class DeltaSaver:
+    def __init__(self, backend, user_id):
+        self.backend = backend
+        self.user_id = user_id
+        self._saved_fields = None   # dernier état capturé (hors logs)
+        self._saved_logs = None     # LogStore capturé (un nouveau store = réécriture)
+
+    def load(self):
+        """Renvoie (data, LogStore) depuis le backend, ou (None, None) si aucune ligne"""
+        data = self.backend.load(self.user_id)
+        if data is None:
+            return None, None
+        logs = LogStore.from_data(data)
+        self._mark_saved({k: v for k, v in data.items() if k != 'logs'}, logs)
+        return data, logs
+
+    def force_full(self):
+        """La prochaine capture sera une écriture complète"""
+        self._saved_fields = None
+
+    def capture(self, fields, logs):
+        """Fige ce qui a changé depuis la dernière capture, ou None si rien n'a changé"""
+        if self._saved_fields is None or logs is not self._saved_logs:
+            # Premier envoi ou journal remplacé (reset, import, compaction) : document complet
+            write = PendingWrite(full=copy.deepcopy({**fields, "logs": logs.to_list()}))
+        else:
+            changed = {k: v for k, v in fields.items() if self._saved_fields.get(k, _MISSING) != v}
+            dirty_logs = logs.dirty_entries()
+            if not changed and not dirty_logs:
+                return None
+            write = PendingWrite(
+                fields=copy.deepcopy(changed),
+                logs={log['date']: copy.deepcopy(log) for log in dirty_logs}
+            )
+        self._mark_saved(fields, logs)
+        return write
+
+    def full_write(self, recent_logs):
+        """Écriture complète du dernier état capturé : champs figés par `capture()`
+        + `recent_logs` (LogStore.to_list() relevé au même moment)"""
+        return PendingWrite(full=copy.deepcopy({**self._saved_fields, "logs": recent_logs}))
+
+    def send(self, write):
+        if write.full is not None:
+            self.backend.save(self.user_id, write.full)
+        else:
+            self.backend.apply(self.user_id, write.fields, list(write.logs.values()))
+
+    def save(self, fields, logs):
+        """Capture et envoie immédiatement.
+
+        Renvoie le type d'écriture effectuée : "full", "delta" ou None.
+        """
+        write = self.capture(fields, logs)
+        if write is None:
+            return None
+        if write.full is not None:
+            self.send(write)
+            return "full"
+        try:
+            self.send(write)
+        except Exception:
+            # Fonction de fusion absente ou en échec : on retombe sur l'écriture complète
+            self.force_full()
+            self.send(self.capture(fields, logs))
+            return "full"
+        return "delta"
+
+    def _mark_saved(self, fields, logs):
+        self._saved_fields = copy.deepcopy(fields)
+        self._saved_logs = logs
+        logs.clear_dirty()
@@ -0,0 +1,65 @@
+"""Authentification locale, utilisée quand Supabase n'est pas configuré.
+
+Même forme que le client Supabase pour ce dont app.py a besoin :
+`client.auth.sign_in_with_password / sign_up / sign_out`, réponses avec un
+attribut `user` (dont `id`). Les comptes (email, user_id, sel, hash PBKDF2)
+sont dans la base SQLite locale (SqliteBackend.add_account / get_account).
+"""
+import hashlib
+import hmac
+import os
+import uuid
+from types import SimpleNamespace
+
+PBKDF2_ITERATIONS = 200_000
+MIN_PASSWORD_LENGTH = 6
+
+
+class LocalAuthError(Exception):
+    """Identifiants refusés (équivalent local de gotrue AuthApiError)"""
+
+
+def _hash(password, salt):
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, PBKDF2_ITERATIONS)
+
+
+def _response(user_id, email):
+    return SimpleNamespace(user=SimpleNamespace(id=user_id, email=email))
+
+
+class LocalAuth:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def sign_up(self, credentials):
+        email = credentials["email"].strip().lower()
+        password = credentials["password"]
+        if not email or len(password) < MIN_PASSWORD_LENGTH:
+            raise LocalAuthError(f"Email requis et mot de passe d'au moins {MIN_PASSWORD_LENGTH} caractères")
+        salt = os.urandom(16)
+        user_id = str(uuid.uuid4())
+        if not self.backend.add_account(email, user_id, salt, _hash(password, salt)):
+            raise LocalAuthError("Un compte existe déjà pour cet email")
+        return _response(user_id, email)
+
+    def sign_in_with_password(self, credentials):
+        email = credentials["email"].strip().lower()
+        account = self.backend.get_account(email)
+        if account is None:
+            # Même coût qu'un mot de passe faux : ne révèle pas quels emails existent
+            _hash(credentials["password"], b"\0" * 16)
+            raise LocalAuthError("Invalid login credentials")
+        user_id, salt, password_hash = account
+        if not hmac.compare_digest(_hash(credentials["password"], salt), password_hash):
+            raise LocalAuthError("Invalid login credentials")
+        return _response(user_id, email)
+
+    def sign_out(self):
+        pass
+
+
+class LocalAuthClient:
+    """Remplace le client Supabase d'authentification d'une session"""
+
+    def __init__(self, backend):
+        self.auth = LocalAuth(backend)
@@ -0,0 +1,146 @@
+"""File d'écriture différée (write-behind) par session.
+
+Le script Streamlit ne fait que `submit()` : la capture du delta est faite
+immédiatement (copie), l'envoi réseau part sur un thread après un court délai.
+Les soumissions rapprochées sont fusionnées en une seule écriture ; en cas
+d'échec, l'écriture est retentée avec un délai exponentiel. Un delta qui
+échoue (fonction de fusion absente ou en échec) est aussitôt remplacé par
+l'écriture complète du dernier état soumis, comme dans DeltaSaver.save.
+
+Le thread d'envoi s'arrête après `idle_timeout` s sans rien à envoyer et
+repart à la soumission suivante : une session abandonnée ne garde pas de
+thread.
+"""
+import threading
+import time
+
+
+class WriteBehindQueue:
+    def __init__(self, saver, debounce=0.5, backoff=1.0, max_backoff=30.0, idle_timeout=30.0):
+        self.saver = saver
+        self.debounce = debounce
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.idle_timeout = idle_timeout
+
+        self.last_flushed_at = None   # time.time() de la dernière écriture réussie
+        self.last_error = None
+        self.failures = 0             # échecs consécutifs
+
+        self._cond = threading.Condition()
+        self._send_lock = threading.Lock()   # garde l'ordre des écritures
+        self._pending = None
+        self._recent_logs = None      # LogStore.to_list() à la dernière soumission (repli complet)
+        self._due = 0.0
+        self._need_full = False
+        self._closed = False
+        self._thread = None
+
+    @property
+    def pending(self):
+        return self._pending is not None
+
+    def submit(self, fields, logs):
+        """Enregistre l'état courant pour une écriture prochaine (thread du script)"""
+        with self._cond:
+            if self._need_full:
+                self.saver.force_full()
+                self._need_full = False
+            write = self.saver.capture(fields, logs)
+            if write is None:
+                return
+            # Entrées immuables une fois ajoutées : une copie de la liste suffit
+            self._recent_logs = logs.to_list()
+            self._pending = write if self._pending is None else self._pending.merge(write)
+            if not self.failures:
+                self._due = time.monotonic() + self.debounce
+            self._ensure_thread()
+            self._cond.notify()
+
+    def _ensure_thread(self):
+        """Démarre le thread d'envoi s'il s'est arrêté (appelé sous self._cond)"""
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def flush(self, timeout=10.0):
+        """Envoie immédiatement l'écriture en attente (ex : à la déconnexion).
+
+        Renvoie True si plus rien n'est en attente.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._send_pending():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(min(self._retry_delay(), max(deadline - time.monotonic(), 0)))
+
+    def close(self, timeout=10.0):
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        return flushed
+
+    def discard(self):
+        """Abandonne l'écriture en attente (état périmé) et arrête le thread"""
+        with self._cond:
+            self._pending = None
+            self._recent_logs = None
+            self._closed = True
+            self._cond.notify()
+
+    def _retry_delay(self):
+        return min(self.backoff * (2 ** max(self.failures - 1, 0)), self.max_backoff)
+
+    def _send_pending(self):
+        """Envoie l'écriture en attente ; True si succès ou rien à envoyer"""
+        with self._send_lock:
+            with self._cond:
+                write, self._pending = self._pending, None
+            if write is None:
+                return True
+            return self._send(write)
+
+    def _send(self, write):
+        try:
+            self.saver.send(write)
+        except Exception as e:
+            with self._cond:
+                self.failures += 1
+                self.last_error = str(e)
+                if write.full is None:
+                    # Un delta qui échoue (fonction de fusion absente ?) : il échouerait encore,
+                    # on le remplace par le document complet du dernier état soumis (qui
+                    # inclut aussi ce qui a pu arriver entre-temps)
+                    self._pending = self.saver.full_write(self._recent_logs)
+                    self._need_full = True
+                else:
+                    # On remet l'écriture en tête, fusionnée avec ce qui a pu arriver entre-temps
+                    self._pending = write if self._pending is None else write.merge(self._pending)
+                self._due = time.monotonic() + self._retry_delay()
+            return False
+        with self._cond:
+            self.failures = 0
+            self.last_error = None
+            self.last_flushed_at = time.time()
+            if self._pending is None:
+                self._recent_logs = None
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and (self._pending is None or time.monotonic() < self._due):
+                    if self._pending is None:
+                        if not self._cond.wait(self.idle_timeout) and self._pending is None:
+                            # Inactif : le thread s'arrête, submit() le relancera
+                            self._thread = None
+                            return
+                    else:
+                        self._cond.wait(self._due - time.monotonic())
+                if self._closed:
+                    self._thread = None
+                    return
+            self._send_pending()
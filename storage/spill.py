@@ -0,0 +1,54 @@
+"""Stockage local des segments de journal déchargés (sessions inactives).
+
+Une table SQLite clé -> segments au format JSONB `log_segments` (déjà
+compressés). Ce n'est pas une sauvegarde : le fichier ne sert qu'au processus
+courant et la clé est effacée dès que les segments sont relus.
+"""
+import json
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS spill (
+    key      TEXT PRIMARY KEY,
+    segments TEXT NOT NULL
+);
+"""
+
+
+class SpillStore:
+    """Fichier SQLite, ou ":memory:" ; une connexion partagée sous verrou"""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            # Rien à reprendre d'un processus précédent
+            self._conn.execute("DELETE FROM spill")
+
+    def put(self, key, segments):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO spill (key, segments) VALUES (?, ?)", (key, json.dumps(segments))
+            )
+
+    def take(self, key):
+        """Segments déchargés sous `key` (liste vide si absents), effacés du stockage"""
+        with self._lock:
+            row = self._conn.execute("SELECT segments FROM spill WHERE key = ?", (key,)).fetchone()
+            self._conn.execute("DELETE FROM spill WHERE key = ?", (key,))
+        return json.loads(row[0]) if row else []
+
+    def discard(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM spill WHERE key = ?", (key,))
+
+    def stats(self):
+        """(nombre de clés, octets sérialisés)"""
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(segments)), 0) FROM spill").fetchone()
+        return count, size
@@ -0,0 +1,222 @@
+"""Backend SQLite embarqué (WAL), interchangeable avec la table Supabase.
+
+Utilisé hors ligne et en développement (app.py sans secrets Supabase), pour
+les tests et comme base de comparaison des benchmarks. Schéma :
+
+- user_data(user_id, data)  : document JSON sans la clé `logs`
+- user_logs(user_id, date, ...) : une ligne par jour, clé primaire
+  (user_id, date) -> chargement d'un compte et upsert d'un jour sur l'index.
+  Le graphique ne relit pas la base : la session a déjà tout l'historique en
+  colonnes (log_store.py), écritures encore en file comprises.
+- citations(type, text, author) ; app.py la remplit depuis citations.json
+- local_accounts(email, user_id, salt, password_hash) : comptes de
+  l'authentification locale (storage/local_auth.py)
+
+Une connexion par thread (les sessions Streamlit et la file d'écriture
+tournent sur des threads distincts) ; le mode WAL laisse les lectures
+concurrentes passer pendant une écriture. Une base ":memory:" n'a qu'une
+connexion, partagée sous verrou.
+"""
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager, nullcontext
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_data (
+    user_id TEXT PRIMARY KEY,
+    data    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_logs (
+    user_id         TEXT NOT NULL,
+    date            TEXT NOT NULL,
+    tasks_completed TEXT,              -- JSON ; NULL pour une entrée compactée
+    completed_count INTEGER,
+    level_up        INTEGER NOT NULL,
+    xp_snapshot,                       -- sans type : int et float gardés tels quels
+    PRIMARY KEY (user_id, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS citations (
+    id     INTEGER PRIMARY KEY,
+    type   TEXT NOT NULL,
+    text   TEXT NOT NULL,
+    author TEXT
+);
+CREATE INDEX IF NOT EXISTS citations_type ON citations (type);
+CREATE TABLE IF NOT EXISTS local_accounts (
+    email         TEXT PRIMARY KEY,
+    user_id       TEXT NOT NULL UNIQUE,
+    salt          BLOB NOT NULL,
+    password_hash BLOB NOT NULL
+);
+"""
+
+_LOG_COLUMNS = "date, tasks_completed, completed_count, level_up, xp_snapshot"
+
+
+def _log_row(user_id, log):
+    tasks = log.get('tasks_completed')
+    return (
+        user_id,
+        log['date'],
+        json.dumps(tasks) if tasks is not None else None,
+        log.get('completed_count') if tasks is None else None,
+        int(bool(log.get('level_up'))),
+        log.get('xp_snapshot', 0),
+    )
+
+
+def _log_entry(date, tasks_completed, completed_count, level_up, xp_snapshot):
+    if tasks_completed is None:
+        return {"date": date, "completed_count": completed_count or 0, "level_up": bool(level_up),
+                "xp_snapshot": xp_snapshot}
+    return {"date": date, "tasks_completed": json.loads(tasks_completed), "level_up": bool(level_up),
+            "xp_snapshot": xp_snapshot}
+
+
+class SqliteBackend:
+    """Fichier SQLite local, ou ":memory:" (base jetable, tests)"""
+
+    table_name = "user_data"
+
+    def __init__(self, path, citations=None, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._shared = None
+        self._lock = nullcontext()
+        if path == ":memory:":
+            self._shared = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+            self._lock = threading.RLock()
+        self._conn().executescript(SCHEMA)
+        if citations:
+            self.seed_citations(citations)
+
+    def _conn(self):
+        if self._shared is not None:
+            return self._shared
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, mode="IMMEDIATE"):
+        """BEGIN IMMEDIATE pour écrire ; "DEFERRED" pour une lecture cohérente sur plusieurs requêtes"""
+        with self._lock:
+            conn = self._conn()
+            conn.execute(f"BEGIN {mode}")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _load_logs(self, conn, user_id):
+        rows = conn.execute(
+            f"SELECT {_LOG_COLUMNS} FROM user_logs WHERE user_id = ? ORDER BY date", (user_id,)
+        )
+        return [_log_entry(*row) for row in rows]
+
+    def _write(self, conn, user_id, data):
+        """Écriture complète d'un document (dans une transaction ouverte)"""
+        fields = {k: v for k, v in data.items() if k != 'logs'}
+        conn.execute(
+            "INSERT INTO user_data (user_id, data) VALUES (?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET data = excluded.data",
+            (user_id, json.dumps(fields))
+        )
+        conn.execute("DELETE FROM user_logs WHERE user_id = ?", (user_id,))
+        self._upsert_logs(conn, user_id, data.get('logs', []))
+
+    def _upsert_logs(self, conn, user_id, logs):
+        conn.executemany(
+            f"INSERT OR REPLACE INTO user_logs (user_id, {_LOG_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+            (_log_row(user_id, log) for log in logs)
+        )
+
+    def load(self, user_id):
+        with self._transaction("DEFERRED") as conn:
+            row = conn.execute("SELECT data FROM user_data WHERE user_id = ?", (user_id,)).fetchone()
+            if row is None:
+                return None
+            data = json.loads(row[0])
+            data['logs'] = self._load_logs(conn, user_id)
+            return data
+
+    def save(self, user_id, data):
+        with self._transaction() as conn:
+            self._write(conn, user_id, data)
+
+    def apply(self, user_id, fields, logs):
+        # Même sémantique que supabase/apply_data_delta.sql
+        with self._transaction() as conn:
+            row = conn.execute("SELECT data FROM user_data WHERE user_id = ?", (user_id,)).fetchone()
+            if row is None:
+                return
+            data = json.loads(row[0])
+            data.update({k: v for k, v in fields.items() if k != 'logs'})
+            conn.execute("UPDATE user_data SET data = ? WHERE user_id = ?", (json.dumps(data), user_id))
+            if 'logs' in fields:
+                conn.execute("DELETE FROM user_logs WHERE user_id = ?", (user_id,))
+                self._upsert_logs(conn, user_id, fields['logs'])
+            self._upsert_logs(conn, user_id, logs)
+
+    def load_page(self, after_user_id, limit):
+        with self._transaction("DEFERRED") as conn:
+            if after_user_id is None:
+                rows = conn.execute("SELECT user_id, data FROM user_data ORDER BY user_id LIMIT ?", (limit,))
+            else:
+                rows = conn.execute(
+                    "SELECT user_id, data FROM user_data WHERE user_id > ? ORDER BY user_id LIMIT ?",
+                    (after_user_id, limit)
+                )
+            page = [(user_id, json.loads(data)) for user_id, data in rows]
+            for user_id, data in page:
+                data['logs'] = self._load_logs(conn, user_id)
+            return page
+
+    def save_many(self, rows):
+        if rows:
+            with self._transaction() as conn:
+                for user_id, data in rows:
+                    self._write(conn, user_id, data)
+
+    def fetch_citations(self, quote_type):
+        with self._lock:
+            rows = self._conn().execute("SELECT text, author FROM citations WHERE type = ?", (quote_type,))
+            return [{"text": text, "author": author} for text, author in rows]
+
+    def seed_citations(self, citations):
+        """Ajoute les citations {type: [{"text", "author"}]} des types encore absents
+        (une base fichier n'est pas re-remplie à chaque démarrage)"""
+        with self._transaction() as conn:
+            present = {t for (t,) in conn.execute("SELECT DISTINCT type FROM citations")}
+            conn.executemany(
+                "INSERT INTO citations (type, text, author) VALUES (?, ?, ?)",
+                [(t, q['text'], q.get('author')) for t, quotes in citations.items() if t not in present
+                 for q in quotes]
+            )
+
+    def add_account(self, email, user_id, salt, password_hash):
+        """Crée un compte local ; False si l'email est déjà pris"""
+        with self._transaction() as conn:
+            try:
+                conn.execute(
+                    "INSERT INTO local_accounts (email, user_id, salt, password_hash) VALUES (?, ?, ?, ?)",
+                    (email, user_id, salt, password_hash)
+                )
+            except sqlite3.IntegrityError:
+                return False
+            return True
+
+    def get_account(self, email):
+        """(user_id, salt, password_hash) du compte local, ou None"""
+        with self._lock:
+            return self._conn().execute(
+                "SELECT user_id, salt, password_hash FROM local_accounts WHERE email = ?", (email,)
+            ).fetchone()
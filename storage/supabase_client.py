@@ -0,0 +1,70 @@
+"""Transport HTTP partagé par tous les clients Supabase du processus.
+
+Un seul pool de connexions httpx (keep-alive, taille bornée) sert à la fois le
+client des données et les clients d'authentification de chaque session : les
+en-têtes d'auth sont posés requête par requête par chaque client, seules les
+connexions TCP/TLS sont mutualisées.
+"""
+import threading
+
+import httpx
+from supabase import create_client
+from supabase.lib.client_options import SyncClientOptions
+
+
+class PoolMetrics:
+    """Compteurs de requêtes et de connexions ouvertes (le reste est de la réutilisation)"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        with self._lock:
+            requests, new_connections = self.requests, self.new_connections
+        return {
+            "requests": requests,
+            "new_connections": new_connections,
+            "reused": max(requests - new_connections, 0),
+            "reuse_rate": (requests - new_connections) / requests if requests else 0.0,
+        }
+
+    def _count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def _trace(self, event_name, info):
+        # httpcore n'émet connect_tcp que lorsqu'il ouvre une nouvelle connexion
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.new_connections += 1
+
+
+class MeteredTransport(httpx.HTTPTransport):
+    def __init__(self, metrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    def handle_request(self, request):
+        self.metrics._count_request()
+        request.extensions["trace"] = self.metrics._trace
+        return super().handle_request(request)
+
+
+def make_http_client(max_connections=20, max_keepalive=10, keepalive_expiry=60.0, timeout=30.0):
+    """Client httpx borné avec keep-alive ; renvoie (client, metrics)"""
+    metrics = PoolMetrics()
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive,
+        keepalive_expiry=keepalive_expiry
+    )
+    transport = MeteredTransport(metrics, http2=True, limits=limits)
+    client = httpx.Client(transport=transport, timeout=timeout, follow_redirects=True)
+    return client, metrics
+
+
+def create_supabase_client(url, key, http_client):
+    """Client Supabase branché sur le transport partagé"""
+    return create_client(url, key, options=SyncClientOptions(httpx_client=http_client))
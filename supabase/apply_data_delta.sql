@@ -0,0 +1,31 @@
+-- Écriture partielle du document JSONB d'un joueur (voir storage/backends.py).
+-- p_fields : champs de premier niveau à remplacer (user_xp, user_lvl, tasks...)
+-- p_logs   : entrées de journal ajoutées/modifiées, fusionnées par date
+--            (sur p_fields->'logs' s'il est fourni : journal remplacé, sinon sur
+--            le journal enregistré ; dans l'UPDATE, `data` est l'ancienne valeur)
+-- Remplacer user_data par le nom de la table (secret SUPABASE_TABLE) si besoin.
+create or replace function apply_data_delta(p_user_id uuid, p_fields jsonb, p_logs jsonb)
+returns void
+language sql
+security invoker
+as $$
+  update user_data
+  set data = jsonb_set(
+    coalesce(data, '{}'::jsonb) || p_fields,
+    '{logs}',
+    (
+      select coalesce(jsonb_agg(entry order by entry->>'date'), '[]'::jsonb)
+      from (
+        select old_log as entry
+        from jsonb_array_elements(coalesce(p_fields->'logs', data->'logs', '[]'::jsonb)) as old_log
+        where not exists (
+          select 1 from jsonb_array_elements(p_logs) as new_log
+          where new_log->>'date' = old_log->>'date'
+        )
+        union all
+        select new_log from jsonb_array_elements(p_logs) as new_log
+      ) merged
+    )
+  )
+  where user_id = p_user_id;
+$$;